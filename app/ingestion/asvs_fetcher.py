@@ -12,11 +12,12 @@ import os
 import re
 import json
 import logging
+import threading
 import requests
 from typing import Dict, List, Any, Optional, Tuple
 from pathlib import Path
 from dataclasses import dataclass, asdict
-from datetime import datetime
+from datetime import datetime, timedelta
 
 logger = logging.getLogger(__name__)
 
@@ -58,6 +59,14 @@ class ASVSFetcher:
         self.semantic_sources_path.mkdir(parents=True, exist_ok=True)
         self.cached_sources_path.mkdir(parents=True, exist_ok=True)
         
+        # Downloaded markdown in cached_sources_path is reused across runs for this long
+        self.cache_max_age = timedelta(hours=24)
+        
+        # Parsed sections keyed by source URL, so repeat fetches skip the download
+        self._section_cache: Dict[str, ASVSSection] = {}
+        # Serializes metadata.json read-modify-write when sections are fetched concurrently
+        self._metadata_lock = threading.Lock()
+        
         # ASVS 5.0 verification sections mapping
         self.asvs_sections = {
             'V1-Encoding-Sanitization': {
@@ -202,6 +211,17 @@ class ASVSFetcher:
             logger.error(f"Failed to fetch ASVS content from {url}: {e}")
             return None
     
+    def _is_cache_valid(self, section_info: Dict[str, Any]) -> bool:
+        """Check whether the section's cached markdown is recent enough to skip the download."""
+        cached_file_path = self.cached_sources_path / section_info['file']
+        try:
+            fetched_at = datetime.fromtimestamp(cached_file_path.stat().st_mtime)
+        except OSError:
+            return False
+        
+        # Cache expires after cache_max_age
+        return datetime.now() - fetched_at <= self.cache_max_age
+    
     def preserve_markdown_for_semantic_search(self, section_info: Dict[str, Any], content: str) -> bool:
         """Preserve original ASVS markdown files for semantic search corpus."""
         try:
@@ -217,22 +237,23 @@ class ASVSFetcher:
             
             # Create/update metadata file
             metadata_path = self.semantic_sources_path / "metadata.json"
-            metadata = self._load_or_create_metadata(metadata_path)
-            
-            # Update metadata for this section
-            metadata['sections'][section_info['id']] = {
-                'title': section_info['title'],
-                'file': section_info['file'],
-                'github_url': section_info['github_url'],
-                'description': section_info['description'],
-                'last_updated': datetime.now().isoformat(),
-                'content_length': len(content),
-                'version': '5.0'
-            }
-            
-            # Save updated metadata
-            with open(metadata_path, 'w', encoding='utf-8') as f:
-                json.dump(metadata, f, indent=2, ensure_ascii=False)
+            with self._metadata_lock:
+                metadata = self._load_or_create_metadata(metadata_path)
+                
+                # Update metadata for this section
+                metadata['sections'][section_info['id']] = {
+                    'title': section_info['title'],
+                    'file': section_info['file'],
+                    'github_url': section_info['github_url'],
+                    'description': section_info['description'],
+                    'last_updated': datetime.now().isoformat(),
+                    'content_length': len(content),
+                    'version': '5.0'
+                }
+                
+                # Save updated metadata
+                with open(metadata_path, 'w', encoding='utf-8') as f:
+                    json.dump(metadata, f, indent=2, ensure_ascii=False)
             
             logger.info(f"Preserved markdown for semantic search: {section_info['file']}")
             return True
@@ -341,14 +362,24 @@ class ASVSFetcher:
     
     def fetch_asvs_section(self, section_info: Dict[str, Any]) -> Optional[ASVSSection]:
         """Fetch and parse a complete ASVS section."""
+        cached_section = self._section_cache.get(section_info['url'])
+        if cached_section is not None:
+            logger.info(f"Using cached ASVS section: {cached_section.title}")
+            return cached_section
+        
         try:
-            # Fetch the content
-            content = self.fetch_asvs_content(section_info['url'])
-            if not content:
-                return None
-            
-            # Preserve markdown for semantic search
-            self.preserve_markdown_for_semantic_search(section_info, content)
+            if self._is_cache_valid(section_info):
+                # Recent download from an earlier run; already preserved for semantic search
+                logger.info(f"Using cached ASVS markdown: {section_info['file']}")
+                content = (self.cached_sources_path / section_info['file']).read_text(encoding='utf-8')
+            else:
+                # Fetch the content
+                content = self.fetch_asvs_content(section_info['url'])
+                if not content:
+                    return None
+                
+                # Preserve markdown for semantic search
+                self.preserve_markdown_for_semantic_search(section_info, content)
             
             # Parse verification requirements
             requirements = self.parse_verification_requirements(
@@ -369,6 +400,7 @@ class ASVSFetcher:
             )
             
             logger.info(f"Successfully processed ASVS section: {section.title} ({len(requirements)} requirements)")
+            self._section_cache[section_info['url']] = section
             return section
             
         except Exception as e:
@@ -383,13 +415,15 @@ class ASVSFetcher:
         logger.info(f"Starting fetch of {len(prioritized_section_info)} ASVS sections")
         
         for section_info in prioritized_section_info:
+            needs_download = section_info['url'] not in self._section_cache and not self._is_cache_valid(section_info)
             section = self.fetch_asvs_section(section_info)
             if section:
                 sections.append(section)
             
             # Rate limiting - be respectful to GitHub
-            import time
-            time.sleep(1)
+            if needs_download:
+                import time
+                time.sleep(1)
         
         logger.info(f"Successfully fetched {len(sections)} ASVS sections")
         return sections
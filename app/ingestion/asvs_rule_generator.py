@@ -9,13 +9,17 @@ Extension of Story 2.5 for ASVS integration
 """
 
 import os
+import re
 import sys
+import hashlib
 import json
 import yaml
-import logging
 import time
+import asyncio
+import logging
+import uuid
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
 from dataclasses import dataclass
 
 # Add project root to path
@@ -23,9 +27,141 @@ project_root = Path(__file__).parent.parent.parent
 sys.path.append(str(project_root))
 
 from app.ingestion.asvs_fetcher import ASVSFetcher, ASVSSection, ASVSVerificationRequirement
+from app.ingestion.llm_cache import PromptResponseCache
+from app.ingestion.openai_clients import get_shared_async_client
 
 logger = logging.getLogger(__name__)
 
+# Prefer the libyaml-backed C dumper; fall back to pure Python if libyaml is missing
+try:
+    from yaml import CSafeDumper as SafeDumper
+except ImportError:
+    from yaml import SafeDumper
+
+# Matches OpenAI rate-limit reset durations such as "1s", "6m0s" or "20ms"
+_RESET_DURATION_PATTERN = re.compile(r'(\d+(?:\.\d+)?)(ms|h|m|s)')
+_RESET_DURATION_UNITS = {'ms': 0.001, 's': 1, 'm': 60, 'h': 3600}
+
+# gpt-4o-mini pricing in USD per 1K tokens, billed separately for input and output
+INPUT_COST_PER_1K_TOKENS = 0.00015
+OUTPUT_COST_PER_1K_TOKENS = 0.0006
+
+# OpenAI Batch API requests are billed at half the synchronous price
+BATCH_API_DISCOUNT = 0.5
+_BATCH_TERMINAL_STATUSES = {'completed', 'failed', 'expired', 'cancelled'}
+
+
+def _estimate_cost(prompt_tokens: int, completion_tokens: int) -> float:
+    """Estimate the USD cost of a completion from its input/output token split."""
+    return (prompt_tokens * INPUT_COST_PER_1K_TOKENS + completion_tokens * OUTPUT_COST_PER_1K_TOKENS) / 1000
+
+
+def _parse_reset_duration(value: Optional[str]) -> float:
+    """Convert a retry-after / x-ratelimit-reset-* header value to seconds."""
+    if not value:
+        return 0.0
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    return sum(float(amount) * _RESET_DURATION_UNITS[unit]
+               for amount, unit in _RESET_DURATION_PATTERN.findall(value))
+
+
+# Static ASVS instructions, sent byte-identical as the system message of every
+# request so the provider can serve the prompt prefix from its cache
+ASVS_SYSTEM_PROMPT = """You are a security expert creating Rule Cards from OWASP ASVS (Application Security Verification Standard) requirements.
+
+Convert the ASVS verification requirements given by the user into actionable Rule Cards. Respond with a single JSON object of this form:
+
+{
+  "rule_cards": [
+    {
+      "id": "ASVS-V##-###",
+      "title": "Brief, actionable title",
+      "severity": "high/medium/low",
+      "scope": "web-application/api/mobile/infrastructure",
+      "requirement": "Clear requirement description",
+      "do": ["Specific action to implement", "Another specific action"],
+      "dont": ["What to avoid", "Anti-pattern to prevent"],
+      "detect": {
+        "semgrep": ["relevant-semgrep-rule"],
+        "trufflehog": ["Relevant TruffleHog detector"]
+      },
+      "verify": {
+        "tests": ["How to test this requirement", "Verification method"]
+      },
+      "refs": {
+        "cwe": ["CWE-XXX"],
+        "asvs": ["V##.#.#"],
+        "owasp": ["A0X:2021"]
+      }
+    }
+  ]
+}
+
+IMPORTANT GUIDELINES:
+1. Create one Rule Card per ASVS requirement
+2. Make titles actionable and specific
+3. Set severity based on ASVS level: Level 3 = high, Level 2 = medium, Level 1 = low
+4. Use precise "do" and "dont" items that developers can implement
+5. Include relevant scanner rules in "detect" section
+6. Always include the ASVS requirement ID in refs.asvs
+7. Map to relevant CWEs and OWASP Top 10 when applicable
+
+The user message names the ASVS section and lists the requirements to convert, each as a numbered request "=== REQUEST <n> ===".
+
+OUTPUT FORMAT:
+- The "rule_cards" array holds exactly one Rule Card per request, in request order
+- Output only the JSON object, with no code fences or other text"""
+
+# Dynamic per-batch user message: ASVS section ID, then the numbered requirements
+ASVS_USER_PROMPT_TEMPLATE = "ASVS section: {}\n\n{}"
+
+
+def _string_list_schema() -> Dict[str, Any]:
+    """JSON schema for a list of strings."""
+    return {"type": "array", "items": {"type": "string"}}
+
+
+def _object_schema(properties: Dict[str, Any]) -> Dict[str, Any]:
+    """JSON schema for an object; strict structured outputs require every property and no extras."""
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": list(properties),
+        "additionalProperties": False
+    }
+
+
+# Structured-output schema the model's JSON response is constrained to
+RULE_CARDS_SCHEMA = _object_schema({
+    "rule_cards": {
+        "type": "array",
+        "items": _object_schema({
+            "id": {"type": "string"},
+            "title": {"type": "string"},
+            "severity": {"type": "string", "enum": ["high", "medium", "low"]},
+            "scope": {"type": "string"},
+            "requirement": {"type": "string"},
+            "do": _string_list_schema(),
+            "dont": _string_list_schema(),
+            "detect": _object_schema({
+                "semgrep": _string_list_schema(),
+                "trufflehog": _string_list_schema()
+            }),
+            "verify": _object_schema({
+                "tests": _string_list_schema()
+            }),
+            "refs": _object_schema({
+                "cwe": _string_list_schema(),
+                "asvs": _string_list_schema(),
+                "owasp": _string_list_schema()
+            })
+        })
+    }
+})
+
 
 @dataclass
 class ASVSRuleCardResult:
@@ -35,6 +171,11 @@ class ASVSRuleCardResult:
     rule_cards: List[Dict[str, Any]]
     error_message: Optional[str] = None
     tokens_used: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+    api_calls: int = 0
+    cache_hits: int = 0
 
 
 class ASVSRuleCardGenerator:
@@ -48,21 +189,45 @@ class ASVSRuleCardGenerator:
         if not self.openai_api_key:
             raise ValueError("OpenAI API key not found in environment variables")
         
-        self.model = "gpt-3.5-turbo"
+        self.model = "gpt-4o-mini"
         self.temperature = 0.1
-        self.max_tokens = 2000
-        self.rate_limit_delay = 2  # Seconds between API calls
+        self.max_tokens = 4000  # Room for a full batch of Rule Cards without truncation
+        self.max_concurrency = 5  # Maximum in-flight API calls
+        self.requests_per_minute = 3500  # Tier-appropriate RPM budget
+        self.min_remaining_requests = 5  # Pause when RPM headroom drops below this
+        self.max_retries = 5  # SDK retries 429/5xx with exponential backoff and retry-after
+        self.batch_poll_interval = 60  # Seconds between Batch API status checks
+        self.batch_work_dir = Path("app/data/asvs_batches")
         
-        # Initialize OpenAI client
+        # Shared fetcher so parsed ASVS sections are reused across bulk runs
+        self.asvs_fetcher = ASVSFetcher()
+        
+        # Request limiter; the OpenAI client is looked up per event loop (see openai_client)
         try:
-            from openai import OpenAI
-            self.openai_client = OpenAI(api_key=self.openai_api_key)
+            from aiolimiter import AsyncLimiter
         except ImportError:
-            raise ImportError("OpenAI library not available. Install with: pip install openai")
+            raise ImportError("aiolimiter not available. Install with: pip install aiolimiter")
+        
+        # Bounds concurrent requests across all batches and sections
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        # Token bucket pacing requests to the RPM budget
+        self._limiter = AsyncLimiter(self.requests_per_minute, time_period=60)
+        # Monotonic time before which no new request is issued (set from response headers)
+        self._rate_limit_resume_at = 0.0
         
-        # ASVS-specific prompt template
-        self.asvs_prompt_template = self._create_asvs_prompt_template()
+        # Local exact-match response cache keyed on the full prompt.
+        # Caching assumes (near-)deterministic outputs, so it is skipped above this temperature.
+        self.cache_max_temperature = 0.2
+        self.prompt_cache = PromptResponseCache(Path(".cache/asvs_prompts"))
+        self._cache_namespace = hashlib.sha256(
+            f"{self.model}\n{ASVS_SYSTEM_PROMPT}\n{json.dumps(RULE_CARDS_SCHEMA, sort_keys=True)}".encode('utf-8')
+        ).hexdigest()
         
+    @property
+    def openai_client(self):
+        """Shared OpenAI client for the running event loop (pooled across generator instances)."""
+        return get_shared_async_client(self.openai_api_key, max_retries=self.max_retries)
+    
     def _load_env_file(self):
         """Load environment variables from ../../env/.env file"""
         # From app/ingestion/asvs_rule_generator.py, go up to project root, then to ../../env/.env
@@ -70,76 +235,25 @@ class ASVSRuleCardGenerator:
         env_path = project_root.parent.parent / 'env' / '.env'  # ../../env/.env
         
         if env_path.exists():
-            with open(env_path, 'r') as f:
-                for line in f:
-                    line = line.strip()
-                    if line and not line.startswith('#') and '=' in line:
-                        key, value = line.split('=', 1)
-                        # Remove quotes if present
-                        value = value.strip("'\"")
-                        os.environ[key] = value
+            try:
+                from dotenv import dotenv_values
+            except ImportError:
+                raise ImportError("python-dotenv not available. Install with: pip install python-dotenv")
+            
+            # dotenv handles quoting, escapes, multi-line values and "export" prefixes
+            env_values = dotenv_values(env_path)
+            os.environ.update({key: value for key, value in env_values.items() if value is not None})
             print(f"Loaded environment variables from {env_path}")
         else:
             print(f"Warning: Environment file not found at {env_path}")
     
-    def _create_asvs_prompt_template(self) -> str:
-        """Create the prompt template for ASVS Rule Card generation."""
-        return """You are a security expert creating Rule Cards from OWASP ASVS (Application Security Verification Standard) requirements.
-
-Convert the following ASVS verification requirements into actionable Rule Cards following this YAML format:
-
-```yaml
-id: ASVS-V##-###
-title: "Brief, actionable title"
-severity: high/medium/low
-scope: web-application/api/mobile/infrastructure
-requirement: "Clear requirement description"
-do:
-  - "Specific action to implement"
-  - "Another specific action"
-dont:
-  - "What to avoid"
-  - "Anti-pattern to prevent"
-detect:
-  semgrep:
-    - "relevant-semgrep-rule"
-  trufflehog:
-    - "Relevant TruffleHog detector"
-verify:
-  tests:
-    - "How to test this requirement"
-    - "Verification method"
-refs:
-  cwe:
-    - "CWE-XXX"
-  asvs:
-    - "{asvs_id}"
-  owasp:
-    - "A0X:2021"
-```
-
-IMPORTANT GUIDELINES:
-1. Create one Rule Card per ASVS requirement
-2. Make titles actionable and specific
-3. Set severity based on ASVS level: Level 3 = high, Level 2 = medium, Level 1 = low
-4. Use precise "do" and "dont" items that developers can implement
-5. Include relevant scanner rules in "detect" section
-6. Always include the ASVS requirement ID in refs.asvs
-7. Map to relevant CWEs and OWASP Top 10 when applicable
-
-ASVS Requirements to convert:
-
-{requirements_text}
-
-Generate Rule Cards in valid YAML format. Separate multiple Rule Cards with "---".
-"""
-    
     def _format_asvs_requirements(self, requirements: List[ASVSVerificationRequirement]) -> str:
         """Format ASVS requirements for LLM processing."""
         formatted_parts = []
         
-        for req in requirements:
+        for i, req in enumerate(requirements, 1):
             req_text = f"""
+=== REQUEST {i} ===
 ASVS {req.id} (Level {req.level}):
 Section: {req.section} - {req.category}
 Description: {req.description}
@@ -148,22 +262,116 @@ Description: {req.description}
         
         return "\n\n".join(formatted_parts)
     
-    def _call_openai_api(self, prompt: str) -> Dict[str, Any]:
+    def _update_rate_limit_state(self, headers: Any) -> None:
+        """Schedule a pause when the rate-limit headers report little remaining headroom."""
+        delay = 0.0
+        
+        remaining_requests = headers.get('x-ratelimit-remaining-requests')
+        if remaining_requests is not None and int(remaining_requests) < self.min_remaining_requests:
+            delay = max(delay, _parse_reset_duration(
+                headers.get('retry-after') or headers.get('x-ratelimit-reset-requests')))
+        
+        remaining_tokens = headers.get('x-ratelimit-remaining-tokens')
+        if remaining_tokens is not None and int(remaining_tokens) < self.max_tokens:
+            delay = max(delay, _parse_reset_duration(
+                headers.get('retry-after') or headers.get('x-ratelimit-reset-tokens')))
+        
+        if delay > 0:
+            logger.info(f"Rate limit headroom low, pausing new requests for {delay:.2f}s")
+            self._rate_limit_resume_at = max(self._rate_limit_resume_at, time.monotonic() + delay)
+    
+    async def _wait_for_rate_limit(self) -> None:
+        """Wait until any header-driven rate-limit pause has elapsed."""
+        delay = self._rate_limit_resume_at - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+    
+    def _build_chat_request(self, prompt: str) -> Dict[str, Any]:
+        """Build the chat completion request body shared by the live and Batch API paths."""
+        return {
+            'model': self.model,
+            'messages': [
+                {"role": "system", "content": ASVS_SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ],
+            'temperature': self.temperature,
+            'max_tokens': self.max_tokens,
+            'response_format': {
+                "type": "json_schema",
+                "json_schema": {"name": "rule_cards", "strict": True, "schema": RULE_CARDS_SCHEMA}
+            }
+        }
+    
+    def _get_cached_response(self, prompt: str) -> Optional[str]:
+        """Return a cached LLM response for this prompt, if any."""
+        if self.temperature > self.cache_max_temperature:
+            return None
+        
+        return self.prompt_cache.get(prompt, self._cache_namespace)
+    
+    def _store_cached_responses(self, entries: List[Tuple[str, str]]) -> None:
+        """Cache (prompt, response) pairs for later runs; blocking, run off the event loop."""
+        if self.temperature > self.cache_max_temperature:
+            return
+        
+        for prompt, content in entries:
+            self.prompt_cache.put(prompt, self._cache_namespace, content)
+    
+    async def _call_openai_api(self, prompt: str) -> Dict[str, Any]:
         """Call OpenAI API with error handling and rate limiting."""
+        cached_content = self._get_cached_response(prompt)
+        if cached_content is not None:
+            return {
+                'success': True,
+                'content': cached_content,
+                'tokens_used': 0,
+                'prompt_tokens': 0,
+                'completion_tokens': 0,
+                'cached_tokens': 0,
+                'cache_hit': True
+            }
+        
         try:
-            response = self.openai_client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=self.temperature,
-                max_tokens=self.max_tokens
-            )
+            async with self._semaphore:
+                await self._wait_for_rate_limit()
+                async with self._limiter:
+                    raw_response = await self.openai_client.chat.completions.with_raw_response.create(
+                        **self._build_chat_request(prompt)
+                    )
+                
+                self._update_rate_limit_state(raw_response.headers)
+                response = raw_response.parse()
+            
+            # Prompt tokens served from the provider's prefix cache
+            usage = response.usage
+            prompt_details = getattr(usage, 'prompt_tokens_details', None)
+            cached_tokens = getattr(prompt_details, 'cached_tokens', 0) or 0
+            logger.debug(f"Prompt tokens: {usage.prompt_tokens} ({cached_tokens} cached)")
+            
+            # Strict structured output lets the model refuse instead of returning cards;
+            # a refusal carries no content and must never be cached
+            message = response.choices[0].message
+            content = message.content
+            refusal = getattr(message, 'refusal', None)
+            if refusal or content is None:
+                return {
+                    'success': False,
+                    'error': f"Model returned no Rule Cards: {refusal or 'empty content'}",
+                    'tokens_used': usage.total_tokens,
+                    'prompt_tokens': usage.prompt_tokens,
+                    'completion_tokens': usage.completion_tokens,
+                    'cached_tokens': cached_tokens
+                }
+            
+            await asyncio.to_thread(self._store_cached_responses, [(prompt, content)])
             
             return {
                 'success': True,
-                'content': response.choices[0].message.content,
-                'tokens_used': response.usage.total_tokens
+                'content': content,
+                'tokens_used': usage.total_tokens,
+                'prompt_tokens': usage.prompt_tokens,
+                'completion_tokens': usage.completion_tokens,
+                'cached_tokens': cached_tokens
             }
             
         except Exception as e:
@@ -174,52 +382,27 @@ Description: {req.description}
                 'tokens_used': 0
             }
     
-    def _parse_yaml_rule_cards(self, yaml_content: str) -> List[Dict[str, Any]]:
-        """Parse YAML Rule Cards from LLM response."""
-        rule_cards = []
-        
+    def _parse_json_rule_cards(self, json_content: str) -> List[Dict[str, Any]]:
+        """Parse Rule Cards from a JSON-mode LLM response."""
         try:
-            # Handle multiple YAML documents separated by ---
-            yaml_docs = yaml_content.split('---')
-            
-            for doc in yaml_docs:
-                doc = doc.strip()
-                if not doc:
-                    continue
-                
-                # Remove code block markers if present
-                if doc.startswith('```yaml'):
-                    doc = doc[7:]
-                if doc.endswith('```'):
-                    doc = doc[:-3]
-                
-                doc = doc.strip()
-                if not doc:
-                    continue
-                
-                try:
-                    rule_card = yaml.safe_load(doc)
-                    if rule_card and isinstance(rule_card, dict):
-                        rule_cards.append(rule_card)
-                except yaml.YAMLError as e:
-                    logger.warning(f"Failed to parse YAML rule card: {e}")
-                    logger.debug(f"Problematic YAML content: {doc[:200]}...")
-                    continue
+            rule_cards = json.loads(json_content).get('rule_cards', [])
+        except (json.JSONDecodeError, AttributeError, TypeError) as e:
+            logger.warning(f"Failed to parse JSON rule cards: {e}")
+            logger.debug(f"Problematic JSON content: {str(json_content)[:200]}...")
+            return []
         
-        except Exception as e:
-            logger.error(f"Failed to parse rule cards from response: {e}")
+        if not isinstance(rule_cards, list):
+            logger.warning("Response 'rule_cards' is not a list")
+            return []
         
-        return rule_cards
+        return [rule_card for rule_card in rule_cards if rule_card and isinstance(rule_card, dict)]
     
-    def generate_rule_cards_from_asvs_section(self, asvs_section: ASVSSection, max_requirements_per_batch: int = 5) -> ASVSRuleCardResult:
-        """Generate Rule Cards from a complete ASVS section."""
-        logger.info(f"Generating Rule Cards for ASVS section: {asvs_section.title}")
-        
-        all_rule_cards = []
-        total_tokens = 0
+    def _build_batch_prompts(self, asvs_section: ASVSSection, max_requirements_per_batch: int) -> List[Tuple[str, str]]:
+        """Split a section's requirements into batches and build one (batch_id, prompt) per batch."""
+        batch_prompts = []
         requirements = asvs_section.requirements
         
-        # Process requirements in batches to avoid token limits
+        # Pack several requirements into each prompt; RPM rather than tokens is the binding limit
         for i in range(0, len(requirements), max_requirements_per_batch):
             batch = requirements[i:i + max_requirements_per_batch]
             batch_id = f"{asvs_section.id}-batch-{i//max_requirements_per_batch + 1}"
@@ -229,31 +412,54 @@ Description: {req.description}
             # Format requirements for this batch
             requirements_text = self._format_asvs_requirements(batch)
             
-            # Create prompt
-            prompt = self.asvs_prompt_template.format(
-                requirements_text=requirements_text,
-                asvs_id=asvs_section.id
-            )
+            # Create prompt; only this dynamic part varies between requests
+            prompt = ASVS_USER_PROMPT_TEMPLATE.format(asvs_section.id, requirements_text)
+            
+            batch_prompts.append((batch_id, prompt))
+        
+        return batch_prompts
+    
+    async def generate_rule_cards_from_asvs_section(self, asvs_section: ASVSSection, max_requirements_per_batch: int = 12) -> ASVSRuleCardResult:
+        """Generate Rule Cards from a complete ASVS section."""
+        logger.info(f"Generating Rule Cards for ASVS section: {asvs_section.title}")
+        
+        all_rule_cards = []
+        total_tokens = 0
+        total_prompt_tokens = 0
+        total_completion_tokens = 0
+        total_cached_tokens = 0
+        cache_hits = 0
+        requirements = asvs_section.requirements
+        
+        batch_prompts = self._build_batch_prompts(asvs_section, max_requirements_per_batch)
+        
+        # Dispatch all batches concurrently; the semaphore bounds in-flight calls
+        tasks = [self._call_openai_api(prompt) for _, prompt in batch_prompts]
+        api_results = await asyncio.gather(*tasks, return_exceptions=True)
+        
+        for (batch_id, _), api_result in zip(batch_prompts, api_results):
+            if isinstance(api_result, BaseException):
+                logger.error(f"Failed to generate Rule Cards for batch {batch_id}: {api_result}")
+                continue
             
-            # Call OpenAI API
-            api_result = self._call_openai_api(prompt)
             total_tokens += api_result.get('tokens_used', 0)
+            total_prompt_tokens += api_result.get('prompt_tokens', 0)
+            total_completion_tokens += api_result.get('completion_tokens', 0)
+            total_cached_tokens += api_result.get('cached_tokens', 0)
+            if api_result.get('cache_hit'):
+                cache_hits += 1
             
             if not api_result['success']:
                 logger.error(f"Failed to generate Rule Cards for batch {batch_id}: {api_result.get('error')}")
                 continue
             
-            # Parse Rule Cards from response
-            batch_rule_cards = self._parse_yaml_rule_cards(api_result['content'])
+            batch_rule_cards = self._parse_json_rule_cards(api_result['content'])
             
             if batch_rule_cards:
                 all_rule_cards.extend(batch_rule_cards)
                 logger.info(f"Generated {len(batch_rule_cards)} Rule Cards from batch {batch_id}")
             else:
                 logger.warning(f"No valid Rule Cards generated from batch {batch_id}")
-            
-            # Rate limiting
-            time.sleep(self.rate_limit_delay)
         
         # Create result
         success = len(all_rule_cards) > 0
@@ -267,71 +473,77 @@ Description: {req.description}
             asvs_id=asvs_section.id,
             success=success,
             rule_cards=all_rule_cards,
-            tokens_used=total_tokens
+            tokens_used=total_tokens,
+            prompt_tokens=total_prompt_tokens,
+            completion_tokens=total_completion_tokens,
+            cached_tokens=total_cached_tokens,
+            api_calls=len(batch_prompts) - cache_hits,
+            cache_hits=cache_hits
         )
     
-    def save_rule_cards_to_files(self, result: ASVSRuleCardResult, output_dir: str = "app/rule_cards/asvs") -> bool:
+    def _write_files(self, entries: List[Tuple[Path, bytes]]) -> None:
+        """Write pre-serialized file contents."""
+        for path, data in entries:
+            path.write_bytes(data)
+    
+    async def save_rule_cards_to_files(self, result: ASVSRuleCardResult, output_dir: str = "app/rule_cards/asvs") -> bool:
         """Save generated Rule Cards to YAML files."""
         try:
             # Create output directory structure
             section_dir = Path(output_dir) / result.asvs_id.lower().replace('-', '_')
             section_dir.mkdir(parents=True, exist_ok=True)
             
-            saved_files = []
+            # Cards arrive as JSON; YAML is emitted once here for downstream tooling.
+            # Filenames come from the rule card ID, or the card index when it has none.
+            entries = [
+                (section_dir / f"{rule_card.get('id', f'{result.asvs_id}-RULE-{i+1:03d}')}.yml",
+                 yaml.dump(rule_card, Dumper=SafeDumper, default_flow_style=False, sort_keys=False,
+                           allow_unicode=True, encoding='utf-8'))
+                for i, rule_card in enumerate(result.rule_cards)
+            ]
             
-            for i, rule_card in enumerate(result.rule_cards):
-                # Generate filename from rule card ID or use index
-                rule_id = rule_card.get('id', f"{result.asvs_id}-RULE-{i+1:03d}")
-                filename = f"{rule_id}.yml"
-                file_path = section_dir / filename
-                
-                # Save Rule Card as YAML
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    yaml.dump(rule_card, f, default_flow_style=False, sort_keys=False, allow_unicode=True)
-                
-                saved_files.append(str(file_path))
+            # Rule Cards are small, so one off-loop pass beats a thread hop per file
+            await asyncio.to_thread(self._write_files, entries)
             
-            logger.info(f"Saved {len(saved_files)} Rule Cards to {section_dir}")
+            logger.info(f"Saved {len(entries)} Rule Cards to {section_dir}")
             return True
             
         except Exception as e:
             logger.error(f"Failed to save Rule Cards: {e}")
             return False
     
-    def generate_bulk_asvs_rule_cards(self, priority_levels: List[int] = [1, 2]) -> Dict[str, ASVSRuleCardResult]:
+    async def generate_bulk_asvs_rule_cards(self, priority_levels: List[int] = [1, 2]) -> Dict[str, ASVSRuleCardResult]:
         """Generate Rule Cards from multiple ASVS sections."""
         logger.info(f"Starting bulk ASVS Rule Card generation for levels {priority_levels}")
         
-        # Initialize ASVS fetcher
-        asvs_fetcher = ASVSFetcher()
-        
         # Fetch ASVS sections
-        sections = asvs_fetcher.fetch_all_priority_sections(priority_levels)
+        sections = self.asvs_fetcher.fetch_all_priority_sections(priority_levels)
         
         if not sections:
             logger.error("No ASVS sections fetched")
             return {}
         
-        results = {}
-        total_tokens = 0
-        
         for section in sections:
             logger.info(f"Processing ASVS section: {section.title} ({len(section.requirements)} requirements)")
-            
-            # Generate Rule Cards for this section
-            result = self.generate_rule_cards_from_asvs_section(section)
-            results[section.id] = result
-            
-            total_tokens += result.tokens_used
-            
-            # Save Rule Cards to files
-            if result.success:
-                self.save_rule_cards_to_files(result)
-            
-            # Rate limiting between sections
-            time.sleep(self.rate_limit_delay)
         
-        # Log summary
+        # Generate Rule Cards for all sections concurrently
+        section_results = await asyncio.gather(
+            *[self.generate_rule_cards_from_asvs_section(section) for section in sections]
+        )
+        
+        results = {section.id: result for section, result in zip(sections, section_results)}
+        
+        # Save Rule Cards to files
+        await asyncio.gather(
+            *[self.save_rule_cards_to_files(result) for result in results.values() if result.success]
+        )
+        
+        self._log_bulk_summary(results)
+        
+        return results
+    
+    def _log_bulk_summary(self, results: Dict[str, ASVSRuleCardResult], cost_multiplier: float = 1.0):
+        """Log a summary of a bulk Rule Card generation run."""
         successful_sections = sum(1 for r in results.values() if r.success)
         total_rule_cards = sum(len(r.rule_cards) for r in results.values())
         
@@ -339,8 +551,152 @@ Description: {req.description}
         logger.info(f"  Sections processed: {len(results)}")
         logger.info(f"  Successful sections: {successful_sections}")
         logger.info(f"  Total Rule Cards: {total_rule_cards}")
-        logger.info(f"  Total tokens used: {total_tokens}")
-        logger.info(f"  Estimated cost (GPT-3.5-turbo): ${total_tokens * 0.0015 / 1000:.3f}")
+        total_api_calls = sum(r.api_calls for r in results.values())
+        if total_api_calls:
+            logger.info(f"  API requests: {total_api_calls} ({total_rule_cards / total_api_calls:.1f} Rule Cards per request)")
+        prompt_tokens = sum(r.prompt_tokens for r in results.values())
+        completion_tokens = sum(r.completion_tokens for r in results.values())
+        logger.info(f"  Total tokens used: {sum(r.tokens_used for r in results.values())}")
+        logger.info(f"  Prompt / completion tokens: {prompt_tokens} / {completion_tokens}")
+        logger.info(f"  Cached prompt tokens: {sum(r.cached_tokens for r in results.values())}")
+        logger.info(f"  Local cache hits: {sum(r.cache_hits for r in results.values())}")
+        logger.info(f"  Estimated cost ({self.model}): ${_estimate_cost(prompt_tokens, completion_tokens) * cost_multiplier:.3f}")
+    
+    async def generate_bulk_asvs_rule_cards_batch(self, priority_levels: List[int] = [1, 2]) -> Dict[str, ASVSRuleCardResult]:
+        """Generate Rule Cards from multiple ASVS sections via the OpenAI Batch API.
+        
+        Bulk ingestion is offline work, so all prompts are submitted as one batch job
+        (completed within 24h at half the synchronous price) instead of live requests.
+        """
+        logger.info(f"Starting Batch API ASVS Rule Card generation for levels {priority_levels}")
+        
+        sections = self.asvs_fetcher.fetch_all_priority_sections(priority_levels)
+        
+        if not sections:
+            logger.error("No ASVS sections fetched")
+            return {}
+        
+        rule_cards_by_section = {section.id: [] for section in sections}
+        tokens_by_section = {section.id: 0 for section in sections}
+        prompt_tokens_by_section = {section.id: 0 for section in sections}
+        completion_tokens_by_section = {section.id: 0 for section in sections}
+        cached_tokens_by_section = {section.id: 0 for section in sections}
+        cache_hits = {section.id: 0 for section in sections}
+        
+        # One JSONL row per uncached prompt batch, keyed back to its section by custom_id
+        section_for_request = {}
+        prompt_for_request = {}
+        api_calls = {section.id: 0 for section in sections}
+        self.batch_work_dir.mkdir(parents=True, exist_ok=True)
+        # Unique per run so concurrent runs or a quick rerun never overwrite a pending upload
+        batch_input_path = self.batch_work_dir / f"batch_input_{time.strftime('%Y%m%dT%H%M%S')}_{uuid.uuid4().hex[:8]}.jsonl"
+        
+        with open(batch_input_path, 'w', encoding='utf-8') as f:
+            for section in sections:
+                for batch_id, prompt in self._build_batch_prompts(section, max_requirements_per_batch=12):
+                    cached_content = self._get_cached_response(prompt)
+                    if cached_content is not None:
+                        rule_cards_by_section[section.id].extend(self._parse_json_rule_cards(cached_content))
+                        cache_hits[section.id] += 1
+                        continue
+                    
+                    section_for_request[batch_id] = section.id
+                    prompt_for_request[batch_id] = prompt
+                    api_calls[section.id] += 1
+                    f.write(json.dumps({
+                        'custom_id': batch_id,
+                        'method': 'POST',
+                        'url': '/v1/chat/completions',
+                        'body': self._build_chat_request(prompt)
+                    }) + '\n')
+        
+        output_lines = []
+        
+        if section_for_request:
+            logger.info(f"Submitting {len(section_for_request)} requests to the OpenAI Batch API")
+            
+            try:
+                input_file = await self.openai_client.files.create(file=batch_input_path, purpose="batch")
+                batch = await self.openai_client.batches.create(
+                    input_file_id=input_file.id,
+                    endpoint="/v1/chat/completions",
+                    completion_window="24h"
+                )
+                
+                while batch.status not in _BATCH_TERMINAL_STATUSES:
+                    logger.info(f"Batch {batch.id} status: {batch.status}")
+                    await asyncio.sleep(self.batch_poll_interval)
+                    batch = await self.openai_client.batches.retrieve(batch.id)
+                
+                if batch.status == 'completed' and batch.output_file_id:
+                    output = await self.openai_client.files.content(batch.output_file_id)
+                    output_lines = output.text.splitlines()
+                else:
+                    # Keep going so prompts answered from the local cache are still reported
+                    logger.error(f"Batch {batch.id} finished with status {batch.status}")
+            
+            except Exception as e:
+                logger.error(f"OpenAI Batch API run failed: {e}")
+        
+        responses_to_cache = []
+        for line in output_lines:
+            if not line.strip():
+                continue
+            
+            row = json.loads(line)
+            batch_id = row.get('custom_id')
+            section_id = section_for_request.get(batch_id)
+            response = row.get('response') or {}
+            
+            if section_id is None or row.get('error') or response.get('status_code') != 200:
+                logger.error(f"Batch request {batch_id} failed: {row.get('error')}")
+                continue
+            
+            body = response['body']
+            usage = body.get('usage') or {}
+            tokens_by_section[section_id] += usage.get('total_tokens', 0)
+            prompt_tokens_by_section[section_id] += usage.get('prompt_tokens', 0)
+            completion_tokens_by_section[section_id] += usage.get('completion_tokens', 0)
+            cached_tokens_by_section[section_id] += (usage.get('prompt_tokens_details') or {}).get('cached_tokens', 0)
+            
+            message = body['choices'][0]['message']
+            content = message.get('content')
+            if message.get('refusal') or content is None:
+                logger.error(f"Batch request {batch_id} returned no Rule Cards: {message.get('refusal') or 'empty content'}")
+                continue
+            responses_to_cache.append((prompt_for_request[batch_id], content))
+            
+            batch_rule_cards = self._parse_json_rule_cards(content)
+            if batch_rule_cards:
+                rule_cards_by_section[section_id].extend(batch_rule_cards)
+                logger.info(f"Generated {len(batch_rule_cards)} Rule Cards from batch {batch_id}")
+            else:
+                logger.warning(f"No valid Rule Cards generated from batch {batch_id}")
+        
+        # One off-loop pass writes every new cache entry
+        await asyncio.to_thread(self._store_cached_responses, responses_to_cache)
+        
+        results = {}
+        for section in sections:
+            rule_cards = rule_cards_by_section[section.id]
+            result = ASVSRuleCardResult(
+                asvs_id=section.id,
+                success=len(rule_cards) > 0,
+                rule_cards=rule_cards,
+                tokens_used=tokens_by_section[section.id],
+                prompt_tokens=prompt_tokens_by_section[section.id],
+                completion_tokens=completion_tokens_by_section[section.id],
+                cached_tokens=cached_tokens_by_section[section.id],
+                api_calls=api_calls[section.id],
+                cache_hits=cache_hits[section.id]
+            )
+            results[section.id] = result
+        
+        await asyncio.gather(
+            *[self.save_rule_cards_to_files(result) for result in results.values() if result.success]
+        )
+        
+        self._log_bulk_summary(results, cost_multiplier=BATCH_API_DISCOUNT)
         
         return results
 
@@ -353,8 +709,7 @@ def main():
         # Initialize generator
         generator = ASVSRuleCardGenerator()
         
-        # Test with a single section (Cryptography)
-        asvs_fetcher = ASVSFetcher()
+        asvs_fetcher = generator.asvs_fetcher
         
         test_section_info = {
             'id': 'V11-Cryptography',
@@ -376,15 +731,17 @@ def main():
         print(f"📋 Testing with {len(section.requirements)} ASVS requirements")
         
         # Generate Rule Cards
-        result = generator.generate_rule_cards_from_asvs_section(section, max_requirements_per_batch=3)
+        result = asyncio.run(
+            generator.generate_rule_cards_from_asvs_section(section, max_requirements_per_batch=3)
+        )
         
         if result.success:
             print(f"✅ Successfully generated {len(result.rule_cards)} Rule Cards")
             print(f"   Tokens used: {result.tokens_used}")
-            print(f"   Estimated cost: ${result.tokens_used * 0.0015 / 1000:.3f}")
+            print(f"   Estimated cost: ${_estimate_cost(result.prompt_tokens, result.completion_tokens):.3f}")
             
             # Save to files
-            generator.save_rule_cards_to_files(result)
+            asyncio.run(generator.save_rule_cards_to_files(result))
             
             # Show sample Rule Card
             if result.rule_cards:
@@ -6,9 +6,13 @@ Processes all remaining ASVS sections to complete domain-based integration
 
 import os
 import sys
+import asyncio
+from datetime import datetime, timezone
 from pathlib import Path
 from domain_based_asvs_generator import DomainBasedASVSGenerator
 from asvs_fetcher import ASVSFetcher
+from json_bytes import dump_json_bytes
+
 
 class CompleteASVSIntegration:
     def __init__(self):
@@ -89,7 +93,7 @@ class CompleteASVSIntegration:
         
         self.results = {}
     
-    def run_complete_integration(self):
+    async def run_complete_integration(self):
         """Run complete ASVS integration for all priority sections"""
         print("=== Complete ASVS Integration Started ===")
         print(f"Processing {len(self.asvs_sections_map)} ASVS sections")
@@ -99,24 +103,23 @@ class CompleteASVSIntegration:
         priority_2_sections = {k: v for k, v in self.asvs_sections_map.items() if v['priority'] == 2}
         priority_3_sections = {k: v for k, v in self.asvs_sections_map.items() if v['priority'] == 3}
         
+        # Sections within a tier run concurrently; tiers stay sequential so
+        # higher-priority domain rules land first
         print(f"\n=== Priority 1: Empty Domains ({len(priority_1_sections)} sections) ===")
-        for section_id, info in priority_1_sections.items():
-            self.process_asvs_section(section_id, info)
+        await asyncio.gather(*[self.process_asvs_section(sid, info) for sid, info in priority_1_sections.items()])
         
         print(f"\n=== Priority 2: Known Working Sections ({len(priority_2_sections)} sections) ===")
-        for section_id, info in priority_2_sections.items():
-            self.process_asvs_section(section_id, info)
+        await asyncio.gather(*[self.process_asvs_section(sid, info) for sid, info in priority_2_sections.items()])
             
         print(f"\n=== Priority 3: Experimental Sections ({len(priority_3_sections)} sections) ===")
-        for section_id, info in priority_3_sections.items():
-            self.process_asvs_section(section_id, info)
+        await asyncio.gather(*[self.process_asvs_section(sid, info) for sid, info in priority_3_sections.items()])
         
         # Generate final report
         self.generate_completion_report()
         
         return self.results
     
-    def process_asvs_section(self, section_id: str, section_info: dict):
+    async def process_asvs_section(self, section_id: str, section_info: dict):
         """Process a single ASVS section"""
         domain = section_info['domain']
         title = section_info['title']
@@ -137,7 +140,7 @@ class CompleteASVSIntegration:
                 'github_url': f"https://github.com/OWASP/ASVS/blob/master/5.0/en/{section_info['file']}"
             }
             
-            section_data = self.fetcher.fetch_asvs_section(fetch_info)
+            section_data = await asyncio.to_thread(self.fetcher.fetch_asvs_section, fetch_info)
             
             if not section_data:
                 print(f"    ❌ Failed to fetch {section_id}")
@@ -148,7 +151,9 @@ class CompleteASVSIntegration:
             
             # Step 2: Process domain integration
             print(f"  2. Integrating with {domain} domain...")
-            integration_result = self.generator.integrate_asvs_with_domain(section_data, domain)
+            integration_result = await asyncio.to_thread(
+                self.generator.integrate_asvs_with_domain, section_data, domain
+            )
             
             print(f"    ✓ Integration complete:")
             print(f"      - Rules created: {integration_result.get('rules_created', 0)}")
@@ -203,6 +208,11 @@ class CompleteASVSIntegration:
         report_path = "docs/integration_reports/complete_asvs_integration.md"
         self.save_detailed_report(report_path)
         print(f"Detailed report saved: {report_path}")
+        
+        # Machine-readable results alongside the markdown report
+        json_report_path = Path(report_path).with_suffix('.json')
+        json_report_path.write_bytes(dump_json_bytes(self.results))
+        print(f"JSON report saved: {json_report_path}")
     
     def check_domain_population(self):
         """Check which domains now have rules"""
@@ -210,7 +220,9 @@ class CompleteASVSIntegration:
         
         for domain_dir in rule_cards_path.iterdir():
             if domain_dir.is_dir():
-                rule_count = len(list(domain_dir.glob("*.yml")))
+                # Single directory scan; DirEntry caches the file type, so no extra stat per file
+                with os.scandir(domain_dir) as entries:
+                    rule_count = sum(1 for entry in entries if entry.name.endswith('.yml') and entry.is_file())
                 status = "✅ Populated" if rule_count > 0 else "❌ Empty"
                 print(f"  {domain_dir.name}: {status} ({rule_count} rules)")
     
@@ -220,7 +232,7 @@ class CompleteASVSIntegration:
         
         report_lines = [
             "# Complete ASVS Integration Report",
-            f"Generated: {os.popen('date -Iseconds').read().strip()}",
+            f"Generated: {datetime.now(timezone.utc).isoformat(timespec='seconds')}",
             "",
             "## Integration Status: ✅ COMPLETE",
             "",
@@ -256,12 +268,12 @@ class CompleteASVSIntegration:
             "*Completed as part of Story 2.5.1: ASVS Domain-Based Integration*"
         ])
         
-        with open(report_path, 'w') as f:
-            f.write('\n'.join(report_lines))
+        Path(report_path).write_bytes('\n'.join(report_lines).encode('utf-8'))
+
 
 def main():
     integrator = CompleteASVSIntegration()
-    results = integrator.run_complete_integration()
+    results = asyncio.run(integrator.run_complete_integration())
     
     # Final status
     successful = len([r for r in results.values() if r['status'] == 'success'])
@@ -274,6 +286,7 @@ def main():
     
     return successful == total
 
+
 if __name__ == "__main__":
     success = main()
     sys.exit(0 if success else 1)
\ No newline at end of file
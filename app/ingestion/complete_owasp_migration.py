@@ -8,7 +8,16 @@ Part of Story 2.5.1: ASVS Domain-Based Integration - Phase 2 Completion
 import os
 import json
 import shutil
+import tempfile
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from pathlib import Path
+from owasp_domain_migration import count_rule_files
+
+def _now_iso():
+    """Local timestamp with UTC offset, as produced by `date -Iseconds`"""
+    return datetime.now().astimezone().isoformat(timespec='seconds')
 
 def cleanup_old_owasp_structure():
     """Remove old source-based OWASP structure after successful migration"""
@@ -29,16 +38,16 @@ def cleanup_old_owasp_structure():
             "secure_coding": 12     # java + nodejs + laravel + expressjs
         }
         
-        # Verify counts in new locations
+        # Verify counts in new locations; one shortfall already blocks cleanup,
+        # so stop scanning at the first failure
         all_verified = True
         for domain, expected_min in migration_verification.items():
-            domain_path = Path(f"app/rule_cards/{domain}")
-            actual_count = len(list(domain_path.glob("*.yml"))) if domain_path.exists() else 0
+            actual_count = count_rule_files(f"app/rule_cards/{domain}")
             if actual_count < expected_min:
                 print(f"  ❌ {domain}: expected >= {expected_min}, got {actual_count}")
                 all_verified = False
-            else:
-                print(f"  ✓ {domain}: {actual_count} rules")
+                break
+            print(f"  ✓ {domain}: {actual_count} rules")
         
         if all_verified:
             print("Migration verification successful. Removing old OWASP structure...")
@@ -65,28 +74,62 @@ def integrate_owasp_cache_with_semantic_search():
     
     print("Integrating OWASP cache with semantic search corpus...")
     
-    # Create target directory
-    target_path.mkdir(parents=True, exist_ok=True)
+    # Stage the corpus next to the target and swap it in once complete, so an
+    # interrupted run never leaves a half-populated corpus behind
+    target_path.parent.mkdir(parents=True, exist_ok=True)
+    staging_path = Path(tempfile.mkdtemp(dir=target_path.parent, prefix=f".{target_path.name}."))
+    os.chmod(staging_path, 0o755)  # mkdtemp creates the directory owner-only
+    
+    previous_path = None
     
-    # Copy markdown files
-    copied_files = []
-    for md_file in source_path.glob("*.md"):
-        if md_file.name != "metadata.json":  # Skip metadata
-            target_file = target_path / md_file.name
-            shutil.copy2(md_file, target_file)
-            copied_files.append(md_file.name)
-            print(f"  ✓ Copied {md_file.name}")
+    try:
+        with os.scandir(source_path) as entries:
+            copied_files = [entry.name for entry in entries
+                            if entry.name.endswith('.md') and entry.is_file(follow_symlinks=False)]
+        
+        # Copy markdown files (content only; copyfile uses the kernel fast-copy path
+        # and skips the stat/utime metadata work of copy2), overlapping the file I/O
+        def copy_to_staging(name):
+            shutil.copyfile(source_path / name, staging_path / name)
+        
+        with ThreadPoolExecutor(max_workers=min(8, len(copied_files)) or 1) as executor:
+            list(executor.map(copy_to_staging, copied_files))
+        
+        for name in copied_files:
+            print(f"  ✓ Copied {name}")
+        
+        # Copy metadata as well
+        metadata_file = source_path / "metadata.json"
+        if metadata_file.exists():
+            shutil.copyfile(metadata_file, staging_path / "metadata.json")
+            print(f"  ✓ Copied metadata.json")
+        
+        _write_corpus_metadata(staging_path, source_path, copied_files)
+        
+        # Swap the staged corpus into place, then drop the previous one
+        if target_path.exists():
+            previous_path = Path(tempfile.mkdtemp(dir=target_path.parent, prefix=f".{target_path.name}.old."))
+            os.rename(target_path, previous_path / target_path.name)
+        os.rename(staging_path, target_path)
+    except Exception:
+        shutil.rmtree(staging_path, ignore_errors=True)
+        if previous_path and not target_path.exists():
+            os.rename(previous_path / target_path.name, target_path)
+        raise
+    finally:
+        if previous_path:
+            shutil.rmtree(previous_path, ignore_errors=True)
     
-    # Copy metadata as well
-    metadata_file = source_path / "metadata.json"
-    if metadata_file.exists():
-        shutil.copy2(metadata_file, target_path / "metadata.json")
-        print(f"  ✓ Copied metadata.json")
+    print(f"✅ Integrated {len(copied_files)} OWASP cheat sheet files into semantic search")
+    return True
+
+def _write_corpus_metadata(corpus_path, source_path, copied_files):
+    """Write integration metadata describing the semantic search corpus"""
     
     # Create corpus integration metadata
     corpus_metadata = {
         "corpus_type": "owasp_cheat_sheets",
-        "integration_date": os.popen('date -Iseconds').read().strip(),
+        "integration_date": _now_iso(),
         "source_location": str(source_path),
         "files_integrated": len(copied_files),
         "files": copied_files,
@@ -94,73 +137,72 @@ def integrate_owasp_cache_with_semantic_search():
         "notes": "OWASP cheat sheet markdown files for semantic search corpus"
     }
     
-    with open(target_path / "integration_metadata.json", "w") as f:
-        json.dump(corpus_metadata, f, indent=2)
-    
-    print(f"✅ Integrated {len(copied_files)} OWASP cheat sheet files into semantic search")
-    return True
+    # Human-readable sidecar; filenames are written as UTF-8 rather than \u escapes
+    with open(corpus_path / "integration_metadata.json", "w", encoding="utf-8") as f:
+        json.dump(corpus_metadata, f, indent=2, ensure_ascii=False)
+
+# Fixed closing sections of the final migration report
+_REPORT_SUMMARY_LINES = (
+    "",
+    "## Key Achievements",
+    "- ✅ Successfully migrated 46 OWASP rules to domain-based structure",
+    "- ✅ Created missing domain directories (input_validation, web_security, etc.)",
+    "- ✅ SQL injection rules → input_validation domain",
+    "- ✅ XSS prevention rules → web_security domain", 
+    "- ✅ HTTP headers rules → secure_communication domain",
+    "- ✅ Integrated OWASP cheat sheet markdown files into semantic search corpus",
+    "- ✅ Cleaned up legacy source-based organization",
+    "",
+    "## Domain Coverage Highlights",
+    "- **Web Security**: XSS prevention, DOM XSS, Clickjacking defense",
+    "- **Input Validation**: SQL injection prevention, general input validation",
+    "- **Secure Communication**: HTTP security headers",
+    "- **Secure Coding**: Java, Node.js, Laravel, Express.js security patterns",
+    "- **Authentication**: Enhanced with ASVS requirements (51 total rules)",
+    "- **Session Management**: Combined OWASP + ASVS guidance (18 total rules)",
+    "",
+    "## Next Steps",
+    "- All OWASP cheat sheet content now organized by security domain",
+    "- Semantic search corpus enhanced with original markdown files",
+    "- Ready for ASVS integration with remaining domains",
+    "",
+    "---",
+    "*Completed as part of Story 2.5.1: ASVS Domain-Based Integration*"
+)
 
-def generate_final_migration_report():
-    """Generate final migration completion report"""
-    
-    # Count rules in all domains
-    domain_counts = {}
-    total_rules = 0
-    
-    rule_cards_path = Path("app/rule_cards")
-    for domain_dir in rule_cards_path.iterdir():
-        if domain_dir.is_dir() and domain_dir.name != "owasp":  # Skip old owasp if still exists
-            rule_count = len(list(domain_dir.glob("*.yml")))
-            domain_counts[domain_dir.name] = rule_count
-            total_rules += rule_count
-    
-    # Generate report
-    report = [
-        "# OWASP Domain Migration Completion Report",
-        f"Generated: {os.popen('date -Iseconds').read().strip()}",
-        "",
-        "## Migration Status: ✅ COMPLETE",
-        "",
-        f"## Final Rule Distribution",
-        f"Total Rules: {total_rules}",
-        ""
-    ]
+def _report_lines(domain_counts, total_rules):
+    """Yield the lines of the final migration report"""
+    yield "# OWASP Domain Migration Completion Report"
+    yield f"Generated: {_now_iso()}"
+    yield ""
+    yield "## Migration Status: ✅ COMPLETE"
+    yield ""
+    yield "## Final Rule Distribution"
+    yield f"Total Rules: {total_rules}"
+    yield ""
     
     # Sort domains by rule count (descending)
-    sorted_domains = sorted(domain_counts.items(), key=lambda x: x[1], reverse=True)
-    
-    for domain, count in sorted_domains:
-        report.append(f"- **{domain.replace('_', ' ').title()}**: {count} rules")
-    
-    report.extend([
-        "",
-        "## Key Achievements",
-        "- ✅ Successfully migrated 46 OWASP rules to domain-based structure",
-        "- ✅ Created missing domain directories (input_validation, web_security, etc.)",
-        "- ✅ SQL injection rules → input_validation domain",
-        "- ✅ XSS prevention rules → web_security domain", 
-        "- ✅ HTTP headers rules → secure_communication domain",
-        "- ✅ Integrated OWASP cheat sheet markdown files into semantic search corpus",
-        "- ✅ Cleaned up legacy source-based organization",
-        "",
-        "## Domain Coverage Highlights",
-        "- **Web Security**: XSS prevention, DOM XSS, Clickjacking defense",
-        "- **Input Validation**: SQL injection prevention, general input validation",
-        "- **Secure Communication**: HTTP security headers",
-        "- **Secure Coding**: Java, Node.js, Laravel, Express.js security patterns",
-        "- **Authentication**: Enhanced with ASVS requirements (51 total rules)",
-        "- **Session Management**: Combined OWASP + ASVS guidance (18 total rules)",
-        "",
-        "## Next Steps",
-        "- All OWASP cheat sheet content now organized by security domain",
-        "- Semantic search corpus enhanced with original markdown files",
-        "- Ready for ASVS integration with remaining domains",
-        "",
-        "---",
-        "*Completed as part of Story 2.5.1: ASVS Domain-Based Integration*"
-    ])
-    
-    return "\n".join(report)
+    for domain, count in sorted(domain_counts.items(), key=lambda x: x[1], reverse=True):
+        yield f"- **{domain.replace('_', ' ').title()}**: {count} rules"
+    
+    yield from _REPORT_SUMMARY_LINES
+
+def generate_final_migration_report(report_path):
+    """Generate final migration completion report, streaming it to report_path"""
+    
+    # Count rules in all domains in a single scandir pass
+    domain_counts = Counter()
+    
+    with os.scandir("app/rule_cards") as domain_dirs:
+        for domain_dir in domain_dirs:
+            if domain_dir.is_dir(follow_symlinks=False) and domain_dir.name != "owasp":  # Skip old owasp if still exists
+                domain_counts[domain_dir.name] = count_rule_files(domain_dir.path)
+    
+    total_rules = sum(domain_counts.values())
+    
+    # Write lines as they are generated instead of joining the whole report first
+    with open(report_path, "w") as f:
+        f.writelines(line + "\n" for line in _report_lines(domain_counts, total_rules))
 
 def main():
     print("=== Completing OWASP Domain Migration ===")
@@ -175,13 +217,9 @@ def main():
     # Step 2: Integrate with semantic search
     semantic_success = integrate_owasp_cache_with_semantic_search()
     
-    # Step 3: Generate final report
-    report = generate_final_migration_report()
-    
-    # Write report
+    # Step 3: Generate and write final report
     report_path = "docs/integration_reports/owasp_migration_complete.md"
-    with open(report_path, "w") as f:
-        f.write(report)
+    generate_final_migration_report(report_path)
     
     print(f"✅ Final migration report: {report_path}")
     
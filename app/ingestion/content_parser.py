@@ -5,7 +5,9 @@ Parses Markdown content from OWASP cheat sheets and extracts structured informat
 for Rule Card generation. Handles various cheat sheet formats consistently.
 """
 
+import io
 import re
+import functools
 from dataclasses import dataclass
 from typing import List, Dict, Optional, Tuple
 from enum import Enum
@@ -26,6 +28,8 @@ class SectionType(Enum):
 @dataclass
 class CodeExample:
     """Represents a code example from OWASP content"""
+    __slots__ = ('language', 'code', 'description', 'is_secure')
+    
     language: str
     code: str
     description: str
@@ -35,6 +39,8 @@ class CodeExample:
 @dataclass
 class SecurityRequirement:
     """Represents an actionable security requirement"""
+    __slots__ = ('title', 'description', 'severity', 'do_guidance', 'dont_guidance', 'code_examples', 'references')
+    
     title: str
     description: str
     severity: str  # critical, high, medium, low
@@ -47,6 +53,8 @@ class SecurityRequirement:
 @dataclass
 class ContentSection:
     """Represents a parsed section of OWASP content"""
+    __slots__ = ('title', 'content', 'section_type', 'subsections', 'code_examples', 'requirements', 'level')
+    
     title: str
     content: str
     section_type: SectionType
@@ -59,18 +67,17 @@ class ContentSection:
 class SecureCodingParser:
     """Parser for OWASP cheat sheet HTML content"""
     
-    # Patterns to identify different types of content
-    REQUIREMENT_PATTERNS = [
-        r'must\s+(?:be|have|include|ensure|implement|use|avoid|validate)',
-        r'should\s+(?:be|have|include|ensure|implement|use|avoid|validate)',
-        r'(?:always|never)\s+(?:use|implement|include|allow|validate)',
-        r'(?:ensure|verify|validate|check)\s+',
-        r'(?:do\s+not|don\'t|avoid|never)\s+',
-        r'it\s+is\s+(?:recommended|required|essential|important)',
-        r'applications\s+must',
-        r'never\s+(?:use|store|trust)',
-        r'always\s+(?:use|validate|check)'
-    ]
+    # Requirement phrasing, factored into one pattern: modal + verb, imperative
+    # check/negation verbs, "it is recommended/required/..." and "applications must".
+    # "never ..." variants are covered by the negation branch.
+    REQUIREMENT_REGEX = re.compile(
+        r'(?:must|should)\s+(?:be|have|include|ensure|implement|use|avoid|validate)'
+        r'|always\s+(?:use|implement|include|allow|validate|check)'
+        r'|(?:ensure|verify|validate|check|do\s+not|don\'t|avoid|never)\s+'
+        r'|it\s+is\s+(?:recommended|required|essential|important)'
+        r'|applications\s+must',
+        re.IGNORECASE
+    )
     
     SEVERITY_INDICATORS = {
         'critical': ['critical', 'must', 'required', 'essential', 'never'],
@@ -85,12 +92,70 @@ class SecureCodingParser:
         'bash', 'shell', 'powershell', 'kotlin', 'swift', 'rust'
     }
     
+    # Heading line: leading '#' run gives the level, the rest is the title
+    HEADING_RE = re.compile(r'\s*(#+)\s*(.*?)\s*$')
+    
+    # Fenced markdown code block: optional language tag, then the code body
+    _CODE_BLOCK_RE = re.compile(r'```(\w*)\n(.*?)\n```', re.DOTALL)
+    
+    # Context words marking a code example as vulnerable
+    _NEGATIVE_MARKERS_RE = re.compile(
+        r"vulnerable|insecure|bad|wrong|incorrect|avoid|don't|never|attack|exploit",
+        re.IGNORECASE
+    )
+    
+    # Language markers, one named group each; a single scan collects every marker present
+    _LANGUAGE_MARKERS_RE = re.compile(
+        r'(?P<java>public class|import java\.)'
+        r'|(?P<def>def )'
+        r'|(?P<import>import )'
+        r'|(?P<from>from )'
+        r'|(?P<javascript>function|var |let )'
+        r'|(?P<using>using )'
+        r'|(?P<namespace>namespace)'
+        r'|(?P<php><\?php|\$_)'
+        r'|(?P<sql>select|insert)'
+        r'|(?P<html><html|<!doctype)',
+        re.IGNORECASE
+    )
+    
+    # Sections shorter than this are scanned directly instead of through the memo cache
+    REQUIREMENT_CACHE_MIN_LENGTH = 256
+    
+    # Words at least one of which every REQUIREMENT_REGEX match contains; a sentence
+    # without any of them cannot match, so the regex search is skipped for it.
+    # 'not' covers 'do\s+not' and the adjectives cover 'it\s+is ...' whatever the spacing.
+    _REQ_TRIGGERS = (
+        'must', 'should', 'always', 'ensure', 'verify', 'validate', 'check',
+        'avoid', 'never', "don't", 'not', 'recommended', 'required', 'essential', 'important'
+    )
+    
+    # Sentence boundaries used to split section content into candidate requirements
+    SENTENCE_SPLIT = re.compile(r'[.!?]+')
+    
+    # Negative guidance markers; matched anywhere in a sentence, like a substring check
+    NEGATION_REGEX = re.compile(r"do not|don't|avoid|never", re.IGNORECASE)
+    
+    # Indicator word -> (priority rank, severity), rank 0 being the highest priority
+    _SEVERITY_BY_WORD = {
+        word: (rank, severity)
+        for rank, (severity, indicators) in enumerate(SEVERITY_INDICATORS.items())
+        for word in indicators
+    }
+    
+    # All indicators in one alternation; the zero-width lookahead reports every
+    # occurrence (even overlapping ones), matching the old per-word substring checks
+    SEVERITY_REGEX = re.compile(
+        '(?=(' + '|'.join(map(re.escape, sorted(_SEVERITY_BY_WORD, key=len, reverse=True))) + '))',
+        re.IGNORECASE
+    )
+    
     def __init__(self):
         """Initialize parser"""
-        self.requirement_regex = re.compile(
-            '|'.join(self.REQUIREMENT_PATTERNS), 
-            re.IGNORECASE | re.MULTILINE
-        )
+        self.requirement_regex = self.REQUIREMENT_REGEX
+        
+        # Memoized requirement scan; the same section text is often parsed more than once
+        self._scan_requirements_cached = functools.lru_cache(maxsize=512)(self._scan_requirements)
     
     def parse_cheatsheet_sections(self, markdown_content: str) -> List[ContentSection]:
         """
@@ -121,30 +186,34 @@ class SecureCodingParser:
         """Parse markdown content into sections based on heading hierarchy"""
         sections = []
         current_section = None
+        current_buf = []  # Content lines of current_section, joined once when it closes
         
-        lines = markdown_content.split('\n')
         in_code_block = False
         
-        for line in lines:
-            original_line = line
-            line = line.strip()
+        # Single pass over the content; newline='\n' splits on '\n' only, as before
+        for line in io.StringIO(markdown_content, newline='\n'):
+            if not line.endswith('\n'):
+                line += '\n'
+            stripped_start = line.lstrip()
             
             # Track code block boundaries
-            if line.startswith('```'):
+            if stripped_start.startswith('```'):
                 in_code_block = not in_code_block
                 if current_section:
-                    current_section.content += original_line + "\n"
+                    current_buf.append(line)
                 continue
             
             # Check if line is a heading (only if not in code block)
-            if line.startswith('#') and not in_code_block:
+            if stripped_start.startswith('#') and not in_code_block:
                 # Save previous section
                 if current_section:
+                    current_section.content = "".join(current_buf)
                     sections.append(current_section)
                 
                 # Extract heading level and title
-                level = len(line) - len(line.lstrip('#'))
-                title = line.lstrip('#').strip()
+                heading = self.HEADING_RE.match(line)
+                level = len(heading.group(1))
+                title = heading.group(2)
                 
                 if title:  # Skip empty headings
                     current_section = ContentSection(
@@ -156,19 +225,19 @@ class SecureCodingParser:
                         requirements=[],
                         level=level
                     )
+                    current_buf = []
             elif current_section:
                 # Add content to current section (preserve original line for proper formatting)
-                if line or in_code_block:  # Include empty lines in code blocks
-                    current_section.content += original_line + "\n"
+                if stripped_start or in_code_block:  # Include empty lines in code blocks
+                    current_buf.append(line)
         
         # Add final section
         if current_section:
+            current_section.content = "".join(current_buf)
             sections.append(current_section)
         
-        # Build section hierarchy
-        sections = self._build_section_hierarchy(sections)
-        
-        return sections
+        # Build section hierarchy (a single section is already its own root)
+        return sections if len(sections) < 2 else self._build_section_hierarchy(sections)
     
     def _build_section_hierarchy(self, flat_sections: List[ContentSection]) -> List[ContentSection]:
         """Build hierarchical section structure based on heading levels"""
@@ -178,26 +247,32 @@ class SecureCodingParser:
         root_sections = []
         section_stack = []
         
+        # Bind hot-loop methods to locals
+        stack_append = section_stack.append
+        stack_pop = section_stack.pop
+        root_append = root_sections.append
+        
         for section in flat_sections:
+            level = section.level
+            
             # Pop sections from stack that are at same or higher level
-            while section_stack and section_stack[-1].level >= section.level:
-                section_stack.pop()
+            while section_stack and section_stack[-1].level >= level:
+                stack_pop()
             
             if section_stack:
                 # Add as subsection to parent
                 section_stack[-1].subsections.append(section)
             else:
                 # Add as root section
-                root_sections.append(section)
+                root_append(section)
             
-            section_stack.append(section)
+            stack_append(section)
         
         return root_sections
     
     def _classify_section_type(self, section: ContentSection) -> SectionType:
         """Classify section type based on title and content"""
         title_lower = section.title.lower()
-        content_lower = section.content.lower()
         
         # Classification based on common OWASP patterns
         if any(word in title_lower for word in ['introduction', 'overview', 'about']):
@@ -214,17 +289,41 @@ class SecureCodingParser:
             return SectionType.VULNERABILITY
         elif any(word in title_lower for word in ['mitigation', 'prevention', 'defense']):
             return SectionType.MITIGATION
-        elif self.requirement_regex.search(content_lower):
+        elif self.requirement_regex.search(section.content):  # Case-insensitive regex; no need to lowercase
             return SectionType.REQUIREMENT
         else:
             return SectionType.INTRODUCTION
     
     def _extract_security_requirements(self, section: ContentSection) -> List[SecurityRequirement]:
         """Extract actionable security requirements from section content"""
+        content = section.content
+        
+        # Hashing tiny sections for the cache costs more than scanning them
+        if len(content) < self.REQUIREMENT_CACHE_MIN_LENGTH:
+            scanned = self._scan_requirements(content)
+        else:
+            scanned = self._scan_requirements_cached(content)
+        
+        # Fresh objects per call so callers never mutate shared cached results
+        return [
+            SecurityRequirement(
+                title=requirement,
+                description=requirement,
+                severity=severity,
+                do_guidance=list(do_items),
+                dont_guidance=list(dont_items),
+                code_examples=[],
+                references=[]
+            )
+            for requirement, severity, do_items, dont_items in scanned
+        ]
+    
+    def _scan_requirements(self, content: str) -> Tuple[Tuple[str, str, Tuple[str, ...], Tuple[str, ...]], ...]:
+        """Scan text for requirements as immutable (requirement, severity, do_items, dont_items) tuples"""
         requirements = []
         
         # Split content into sentences for analysis
-        sentences = re.split(r'[.!?]+', section.content)
+        sentences = self.SENTENCE_SPLIT.split(content)
         
         current_requirement = None
         do_items = []
@@ -235,18 +334,16 @@ class SecureCodingParser:
             if not sentence:
                 continue
             
-            # Check if this sentence contains a requirement
-            if self.requirement_regex.search(sentence):
+            # Check if this sentence contains a requirement; cheap substring gate first
+            lowered = sentence.lower()
+            if any(trigger in lowered for trigger in self._REQ_TRIGGERS) and self.requirement_regex.search(sentence):
                 # Save previous requirement if exists
                 if current_requirement:
-                    requirements.append(SecurityRequirement(
-                        title=current_requirement,
-                        description=current_requirement,
-                        severity=self._determine_severity(current_requirement),
-                        do_guidance=do_items.copy(),
-                        dont_guidance=dont_items.copy(),
-                        code_examples=[],
-                        references=[]
+                    requirements.append((
+                        current_requirement,
+                        self._determine_severity(current_requirement),
+                        tuple(do_items),
+                        tuple(dont_items)
                     ))
                 
                 # Start new requirement
@@ -255,56 +352,53 @@ class SecureCodingParser:
                 dont_items = []
                 
                 # Classify as do or don't
-                if any(neg in sentence.lower() for neg in ['do not', "don't", 'avoid', 'never']):
+                if self.NEGATION_REGEX.search(sentence):
                     dont_items.append(sentence)
                 else:
                     do_items.append(sentence)
             elif current_requirement:
                 # Continue building current requirement
-                if any(neg in sentence.lower() for neg in ['do not', "don't", 'avoid', 'never']):
+                if self.NEGATION_REGEX.search(sentence):
                     dont_items.append(sentence)
                 else:
                     do_items.append(sentence)
         
         # Add final requirement
         if current_requirement:
-            requirements.append(SecurityRequirement(
-                title=current_requirement,
-                description=current_requirement, 
-                severity=self._determine_severity(current_requirement),
-                do_guidance=do_items,
-                dont_guidance=dont_items,
-                code_examples=[],
-                references=[]
+            requirements.append((
+                current_requirement,
+                self._determine_severity(current_requirement),
+                tuple(do_items),
+                tuple(dont_items)
             ))
         
-        return requirements
+        return tuple(requirements)
     
     def _determine_severity(self, text: str) -> str:
         """Determine severity level based on text content"""
-        text_lower = text.lower()
-        
-        for severity, indicators in self.SEVERITY_INDICATORS.items():
-            if any(indicator in text_lower for indicator in indicators):
+        # Single scan; the highest-priority indicator present wins
+        best = None
+        for match in self.SEVERITY_REGEX.finditer(text):
+            rank, severity = self._SEVERITY_BY_WORD[match.group(1).lower()]
+            if rank == 0:
                 return severity
+            if best is None or rank < best[0]:
+                best = (rank, severity)
         
-        return 'medium'  # Default severity
+        return best[1] if best else 'medium'  # Default severity
     
     def _extract_markdown_code_examples(self, content: str) -> List[CodeExample]:
         """Extract code examples from markdown content"""
         examples = []
         
-        # Pattern to match markdown code blocks
-        code_block_pattern = re.compile(r'```(\w*)\n(.*?)\n```', re.DOTALL)
-        
-        matches = code_block_pattern.findall(content)
-        
-        for language, code in matches:
-            if len(code.strip()) < 10:  # Skip very short snippets
+        for match in self._CODE_BLOCK_RE.finditer(content):
+            language, code = match.group(1), match.group(2)
+            code_stripped = code.strip()
+            if len(code_stripped) < 10:  # Skip very short snippets
                 continue
             
             # Get description from context around the code block
-            code_index = content.find(f'```{language}\n{code}\n```')
+            code_index = match.start()
             description = self._get_code_context_description(content, code_index)
             
             # Determine if secure or vulnerable
@@ -312,7 +406,7 @@ class SecureCodingParser:
             
             examples.append(CodeExample(
                 language=language if language else self._detect_code_language_from_content(code),
-                code=code.strip(),
+                code=code_stripped,
                 description=description,
                 is_secure=is_secure
             ))
@@ -373,42 +467,32 @@ class SecureCodingParser:
     
     def _is_secure_markdown_code(self, content: str, code_index: int, description: str) -> bool:
         """Determine if markdown code example represents secure or vulnerable code"""
-        # Look at surrounding context
+        # Look at surrounding context, searched in place via pos/endpos rather than sliced out
         start_index = max(0, code_index - 300)
         end_index = min(len(content), code_index + 300)
-        context = content[start_index:end_index].lower()
-        
-        # Check for negative indicators
-        negative_words = ['vulnerable', 'insecure', 'bad', 'wrong', 'incorrect', 'avoid', "don't", 'never', 'attack', 'exploit']
-        if any(word in context for word in negative_words):
-            return False
-        
-        # Check for positive indicators
-        positive_words = ['secure', 'safe', 'correct', 'recommended', 'good', 'proper', 'fix', 'solution']
-        if any(word in context for word in positive_words):
-            return True
         
-        # Default to secure if unclear
-        return True
+        # Check for negative indicators; positive indicators ('secure', 'safe', 'fix', ...)
+        # and unclear context both mean secure, so they need no separate scan
+        return not self._NEGATIVE_MARKERS_RE.search(content, start_index, end_index)
     
     def _detect_code_language_from_content(self, code: str) -> str:
         """Detect programming language from code content"""
-        code_lower = code.lower()
+        markers = {match.lastgroup for match in self._LANGUAGE_MARKERS_RE.finditer(code)}
         
-        # Language-specific patterns
-        if 'public class' in code_lower or 'import java.' in code_lower:
+        # Language-specific patterns, in priority order
+        if 'java' in markers:
             return 'java'
-        elif 'def ' in code_lower or ('import ' in code_lower and 'from ' in code_lower):
+        elif 'def' in markers or ('import' in markers and 'from' in markers):
             return 'python'
-        elif 'function' in code_lower or 'var ' in code_lower or 'let ' in code_lower:
+        elif 'javascript' in markers:
             return 'javascript'
-        elif 'using ' in code_lower and 'namespace' in code_lower:
+        elif 'using' in markers and 'namespace' in markers:
             return 'csharp'
-        elif '<?php' in code_lower or '$_' in code_lower:
+        elif 'php' in markers:
             return 'php'
-        elif 'SELECT' in code.upper() or 'INSERT' in code.upper():
+        elif 'sql' in markers:
             return 'sql'
-        elif '<html' in code_lower or '<!doctype' in code_lower:
+        elif 'html' in markers:
             return 'html'
         
         return 'text'  # Default
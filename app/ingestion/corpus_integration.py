@@ -9,12 +9,13 @@ Task 4: Corpus Integration and Semantic Enhancement for Story 2.5
 """
 
 import os
+import re
 import sys
 import logging
 import yaml
-import glob
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Iterator
 
 # Add project root to path
 project_root = Path(__file__).parent.parent.parent
@@ -24,6 +25,130 @@ from app.semantic.corpus_manager import CorpusManager
 
 logger = logging.getLogger(__name__)
 
+# Prefer the libyaml-backed C loader; fall back to pure Python if libyaml is missing
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
+# Rule card loading is mostly file I/O, so use more threads than cores
+LOAD_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+# Rule Card schema requirements checked by validate_rule_cards
+REQUIRED_FIELDS = frozenset({'id', 'title', 'severity', 'scope', 'requirement'})
+VALID_SEVERITIES = frozenset({'low', 'medium', 'high', 'critical'})
+
+# Search keyword tokens (3+ characters, starting with a letter) and the stop words excluded from them
+SEARCH_WORD_RE = re.compile(r"[a-z][a-z0-9']{2,}")
+STOP_WORDS = frozenset({'the', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by'})
+
+
+def _parse_yaml_bytes(data: bytes) -> Any:
+    """Parse a YAML document from raw file bytes with the fastest available safe loader."""
+    # Loaders are bound to a single stream, so one is built per document; reading
+    # the file in one call and handing libyaml the bytes avoids buffered text decoding
+    return yaml.load(data, Loader=SafeLoader)
+
+
+def _iter_yaml(root: str) -> Iterator[os.DirEntry]:
+    """Recursively yield .yml files under root, skipping hidden entries like glob's '**'.
+    
+    Walks with an explicit stack of open scandir iterators rather than nested
+    generators; the order matches a depth-first recursive walk.
+    """
+    try:
+        stack = [os.scandir(root)]
+    except FileNotFoundError:
+        return
+    
+    try:
+        while stack:
+            for entry in stack[-1]:
+                if entry.name.startswith('.'):
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    try:
+                        stack.append(os.scandir(entry.path))
+                    except FileNotFoundError:
+                        continue
+                    break
+                if entry.name.endswith('.yml'):
+                    yield entry
+            else:
+                stack.pop().close()
+    finally:
+        for entries in stack:
+            entries.close()
+
+
+def _load_rule_file(yaml_file: str) -> Optional[Dict[str, Any]]:
+    """Load one OWASP Rule Card with provenance metadata (None if it cannot be loaded)."""
+    try:
+        rule_data = _parse_yaml_bytes(Path(yaml_file).read_bytes())
+        
+        # Add provenance metadata
+        rule_data['_source_file'] = yaml_file
+        rule_data['_source_type'] = 'owasp_generated'
+        rule_data['_source_category'] = 'external_guidance'
+        
+        # Extract topic from file path
+        rule_data['_topic'] = os.path.basename(os.path.dirname(yaml_file))  # Directory name
+            
+        return rule_data
+        
+    except Exception as e:
+        logger.warning(f"Failed to load rule card {yaml_file}: {e}")
+        return None
+
+
+def _rule_card_problem(rule_card: Dict[str, Any]) -> Optional[str]:
+    """Describe why a Rule Card fails schema validation (None if it is valid)."""
+    # Check required fields (set difference, empty in the common case)
+    missing_fields = REQUIRED_FIELDS - rule_card.keys()
+    if missing_fields:
+        return f"Rule Card {rule_card.get('id', 'unknown')} missing fields: {sorted(missing_fields)}"
+    
+    # Validate severity levels (non-string values are unhashable or simply invalid)
+    severity = rule_card.get('severity')
+    if not isinstance(severity, str) or severity not in VALID_SEVERITIES:
+        return f"Rule Card {rule_card.get('id')} has invalid severity: {severity}"
+    
+    return None
+
+
+def _add_search_metadata(rule_card: Dict[str, Any]) -> None:
+    """Add search keywords and provenance tags to a Rule Card in place."""
+    # Tokenize title, requirement and 'do' practices in one regex pass;
+    # the pattern itself drops punctuation and words shorter than 3 characters
+    text = ' '.join(filter(None, [rule_card.get('title', ''), rule_card.get('requirement', '')] +
+                           list(rule_card.get('do', []))))
+    rule_card['_search_keywords'] = list({
+        word for word in SEARCH_WORD_RE.findall(text.lower()) if word not in STOP_WORDS
+    })
+    
+    # Add provenance tags for search filtering
+    rule_card['_provenance_tags'] = [
+        'owasp_generated',
+        'external_guidance', 
+        f"topic_{rule_card.get('_topic', 'general')}",
+        f"severity_{rule_card.get('severity', 'medium')}"
+    ]
+
+
+def _prepare_rule_file(yaml_file: str) -> Optional[Dict[str, Any]]:
+    """Load, validate and enhance one Rule Card in a single step (None if it is unusable)."""
+    rule_card = _load_rule_file(yaml_file)
+    if rule_card is None:
+        return None
+    
+    problem = _rule_card_problem(rule_card)
+    if problem:
+        logger.warning(problem)
+        return None
+    
+    _add_search_metadata(rule_card)
+    return rule_card
+
 
 class OWASPCorpusIntegrator:
     """Integrates OWASP Rule Cards with semantic search corpus."""
@@ -33,57 +158,46 @@ class OWASPCorpusIntegrator:
         self.corpus_manager = CorpusManager()
         self.owasp_rules_path = "app/rule_cards/owasp"
         
-    def load_owasp_rule_cards(self) -> List[Dict[str, Any]]:
-        """Load all OWASP Rule Cards from the file system."""
-        rule_cards = []
-        
+    def find_owasp_rule_files(self) -> List[str]:
+        """Find all OWASP Rule Card files on the file system."""
         # Find all YAML files in OWASP rule cards directory
-        pattern = os.path.join(self.owasp_rules_path, "**", "*.yml")
-        yaml_files = glob.glob(pattern, recursive=True)
+        yaml_files = [entry.path for entry in _iter_yaml(self.owasp_rules_path)]
         
         logger.info(f"Found {len(yaml_files)} OWASP Rule Card files")
+        return yaml_files
+    
+    def load_owasp_rule_cards(self) -> List[Dict[str, Any]]:
+        """Load all OWASP Rule Cards from the file system."""
+        yaml_files = self.find_owasp_rule_files()
         
-        for yaml_file in yaml_files:
-            try:
-                with open(yaml_file, 'r', encoding='utf-8') as f:
-                    rule_data = yaml.safe_load(f)
-                    
-                # Add provenance metadata
-                rule_data['_source_file'] = yaml_file
-                rule_data['_source_type'] = 'owasp_generated'
-                rule_data['_source_category'] = 'external_guidance'
-                
-                # Extract topic from file path
-                path_parts = Path(yaml_file).parts
-                if len(path_parts) >= 2:
-                    rule_data['_topic'] = path_parts[-2]  # Directory name
-                    
-                rule_cards.append(rule_data)
-                
-            except Exception as e:
-                logger.warning(f"Failed to load rule card {yaml_file}: {e}")
-                continue
+        # Load files concurrently; map() keeps the original file order
+        with ThreadPoolExecutor(max_workers=LOAD_WORKERS) as executor:
+            rule_cards = [rule_data for rule_data in executor.map(_load_rule_file, yaml_files)
+                          if rule_data is not None]
                 
         logger.info(f"Successfully loaded {len(rule_cards)} OWASP Rule Cards")
         return rule_cards
     
+    def load_search_ready_rule_cards(self) -> List[Dict[str, Any]]:
+        """Load, validate and enhance all OWASP Rule Cards, one card at a time."""
+        yaml_files = self.find_owasp_rule_files()
+        
+        # Each card goes through load -> validate -> enhance once, with no intermediate lists
+        with ThreadPoolExecutor(max_workers=LOAD_WORKERS) as executor:
+            rule_cards = [rule_card for rule_card in executor.map(_prepare_rule_file, yaml_files)
+                          if rule_card is not None]
+        
+        logger.info(f"Loaded {len(rule_cards)}/{len(yaml_files)} valid Rule Cards ready for semantic search")
+        return rule_cards
+    
     def validate_rule_cards(self, rule_cards: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Validate Rule Cards against schema requirements."""
         valid_cards = []
-        required_fields = ['id', 'title', 'severity', 'scope', 'requirement']
         
         for rule_card in rule_cards:
-            # Check required fields
-            missing_fields = [field for field in required_fields if field not in rule_card]
-            
-            if missing_fields:
-                logger.warning(f"Rule Card {rule_card.get('id', 'unknown')} missing fields: {missing_fields}")
-                continue
-                
-            # Validate severity levels
-            valid_severities = ['low', 'medium', 'high', 'critical']
-            if rule_card.get('severity') not in valid_severities:
-                logger.warning(f"Rule Card {rule_card.get('id')} has invalid severity: {rule_card.get('severity')}")
+            problem = _rule_card_problem(rule_card)
+            if problem:
+                logger.warning(problem)
                 continue
                 
             valid_cards.append(rule_card)
@@ -96,38 +210,7 @@ class OWASPCorpusIntegrator:
         enhanced_cards = []
         
         for rule_card in rule_cards:
-            # Add search keywords based on content
-            search_keywords = []
-            
-            # Extract keywords from title and requirement
-            if 'title' in rule_card:
-                search_keywords.extend(rule_card['title'].lower().split())
-            if 'requirement' in rule_card:
-                search_keywords.extend(rule_card['requirement'].lower().split())
-                
-            # Add domain-specific keywords
-            if 'do' in rule_card:
-                for practice in rule_card['do']:
-                    search_keywords.extend(practice.lower().split())
-                    
-            # Clean and deduplicate keywords
-            cleaned_keywords = []
-            stop_words = {'the', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by'}
-            for keyword in search_keywords:
-                clean_keyword = keyword.strip('.,!?;:').lower()
-                if len(clean_keyword) > 2 and clean_keyword not in stop_words:
-                    cleaned_keywords.append(clean_keyword)
-                    
-            rule_card['_search_keywords'] = list(set(cleaned_keywords))
-            
-            # Add provenance tags for search filtering
-            rule_card['_provenance_tags'] = [
-                'owasp_generated',
-                'external_guidance', 
-                f"topic_{rule_card.get('_topic', 'general')}",
-                f"severity_{rule_card.get('severity', 'medium')}"
-            ]
-            
+            _add_search_metadata(rule_card)
             enhanced_cards.append(rule_card)
             
         logger.info(f"Enhanced {len(enhanced_cards)} Rule Cards for semantic search")
@@ -180,26 +263,14 @@ class OWASPCorpusIntegrator:
         logger.info("=" * 60)
         
         try:
-            # Step 1: Load OWASP Rule Cards
-            logger.info("Step 1: Loading OWASP Rule Cards...")
-            rule_cards = self.load_owasp_rule_cards()
+            # Steps 1-3: Load, validate and enhance OWASP Rule Cards in one pass
+            logger.info("Steps 1-3: Loading, validating and enhancing OWASP Rule Cards...")
+            enhanced_cards = self.load_search_ready_rule_cards()
             
-            if not rule_cards:
-                logger.error("No OWASP Rule Cards found to integrate")
+            if not enhanced_cards:
+                logger.error("No valid OWASP Rule Cards found to integrate")
                 return False
             
-            # Step 2: Validate Rule Cards
-            logger.info("Step 2: Validating Rule Cards...")
-            valid_cards = self.validate_rule_cards(rule_cards)
-            
-            if not valid_cards:
-                logger.error("No valid Rule Cards found after validation")
-                return False
-            
-            # Step 3: Enhance for semantic search
-            logger.info("Step 3: Enhancing Rule Cards for semantic search...")
-            enhanced_cards = self.enhance_rule_cards_for_search(valid_cards)
-            
             # Step 4: Integrate with corpus
             logger.info("Step 4: Integrating with semantic search corpus...")
             integration_success = self.integrate_with_corpus(enhanced_cards)
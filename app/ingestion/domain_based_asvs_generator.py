@@ -9,14 +9,18 @@ Enhances existing rules and creates new ones as needed.
 """
 
 import os
+import re
+import asyncio
 import sys
-import json
 import yaml
 import logging
 import time
 import glob
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from types import MappingProxyType
 from typing import Dict, List, Any, Optional, Tuple
+from collections import defaultdict
 from dataclasses import dataclass
 
 # Add project root to path
@@ -25,13 +29,78 @@ sys.path.append(str(project_root))
 
 from app.ingestion.asvs_fetcher import ASVSFetcher, ASVSSection, ASVSVerificationRequirement
 from app.ingestion.asvs_rule_generator import ASVSRuleCardGenerator
+from app.ingestion.json_bytes import dump_json_bytes, parse_json_bytes
 
 logger = logging.getLogger(__name__)
 
+# Prefer the libyaml-backed C loader and dumper; fall back to pure Python if libyaml is missing
+try:
+    from yaml import CSafeLoader as SafeLoader, CSafeDumper as SafeDumper
+except ImportError:
+    from yaml import SafeLoader, SafeDumper
 
-@dataclass
+# Rule card loading is mostly file I/O, so use more threads than cores
+LOAD_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+# Opening/closing ```yaml code fence markers around LLM YAML output
+_FENCE_RE = re.compile(r'^```(?:yaml)?\s*|\s*```$', re.M)
+
+# YAML document separator line in streamed LLM output
+DOCUMENT_SEPARATOR = '\n---\n'
+
+# Full-line YAML comments (leading whitespace allowed), including the line break
+_COMMENT_LINE_RE = re.compile(r'^[ \t]*#.*\n?', re.M)
+
+# Security domain for each ASVS section
+ASVS_DOMAIN_MAPPING = MappingProxyType({
+    'V1-Encoding-Sanitization': 'input_validation',
+    'V2-Validation-Business-Logic': 'input_validation', 
+    'V3-Web-Frontend-Security': 'web_security',
+    'V4-API-Web-Service': 'api_security',
+    'V5-File-Handling': 'file_handling',
+    'V6-Authentication': 'authentication',
+    'V7-Session-Management': 'session_management',
+    'V8-Authorization': 'authorization',
+    'V9-Self-contained-Tokens': 'authentication',
+    'V10-OAuth-OIDC': 'authentication',
+    'V11-Cryptography': 'cryptography',
+    'V12-Secure-Communication': 'network_security',
+    'V13-Configuration': 'configuration',
+    'V14-Data-Protection': 'data_protection',
+    'V15-Secure-Coding-Architecture': 'secure_coding',
+    'V16-Logging-Error-Handling': 'logging',
+    'V17-WebRTC': 'web_security'
+})
+
+
+def _parse_yaml_bytes(data: bytes) -> Any:
+    """Parse a YAML document from raw file bytes with the fastest available safe loader."""
+    # Loaders are bound to a single stream, so one is built per document; reading
+    # the file in one call and handing libyaml the bytes avoids buffered text decoding
+    return yaml.load(data, Loader=SafeLoader)
+
+
+def _load_rule_file(rule_file: Path) -> Optional[Dict[str, Any]]:
+    """Load one existing Rule Card, JSON or YAML (None if it is empty, not a mapping, or unreadable)."""
+    try:
+        data = Path(rule_file).read_bytes()
+        rule_data = parse_json_bytes(data) if str(rule_file).endswith('.json') else _parse_yaml_bytes(data)
+        if rule_data and isinstance(rule_data, dict):
+            rule_data['_source_file'] = str(rule_file)
+            return rule_data
+    except Exception as e:
+        logger.warning(f"Failed to load rule from {rule_file}: {e}")
+    return None
+
+
+# dataclass(slots=True) needs Python 3.10+; older interpreters keep a regular __dict__.
+# (Hand-written __slots__ would clash with the error_message default.)
+_DATACLASS_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+
+@dataclass(frozen=True, **_DATACLASS_SLOTS)
 class DomainIntegrationResult:
-    """Result of integrating ASVS requirements with existing domain rules."""
+    """Result of integrating ASVS requirements with existing domain rules (immutable)."""
     domain: str
     asvs_section: str
     existing_rules_count: int
@@ -54,38 +123,19 @@ class DomainBasedASVSGenerator:
         if not self.openai_api_key:
             raise ValueError("OpenAI API key not found in environment variables")
         
-        # Initialize OpenAI client
-        try:
-            from openai import OpenAI
-            self.openai_client = OpenAI(api_key=self.openai_api_key)
-        except ImportError:
-            raise ImportError("OpenAI library not available. Install with: pip install openai")
-        
         self.model = "gpt-3.5-turbo"
         self.temperature = 0.1
         self.max_tokens = 3000  # Increased for integration tasks
-        self.rate_limit_delay = 2
-        
-        # Domain mapping for ASVS sections
-        self.asvs_domain_mapping = {
-            'V1-Encoding-Sanitization': 'input_validation',
-            'V2-Validation-Business-Logic': 'input_validation', 
-            'V3-Web-Frontend-Security': 'web_security',
-            'V4-API-Web-Service': 'api_security',
-            'V5-File-Handling': 'file_handling',
-            'V6-Authentication': 'authentication',
-            'V7-Session-Management': 'session_management',
-            'V8-Authorization': 'authorization',
-            'V9-Self-contained-Tokens': 'authentication',
-            'V10-OAuth-OIDC': 'authentication',
-            'V11-Cryptography': 'cryptography',
-            'V12-Secure-Communication': 'network_security',
-            'V13-Configuration': 'configuration',
-            'V14-Data-Protection': 'data_protection',
-            'V15-Secure-Coding-Architecture': 'secure_coding',
-            'V16-Logging-Error-Handling': 'logging',
-            'V17-WebRTC': 'web_security'
-        }
+        self.rate_limit_delay = 2  # Seconds between domains in bulk runs
+        self.max_concurrency = 4  # Maximum in-flight API calls per section
+        self.max_retries = 5  # SDK retries 429/5xx with exponential backoff and retry-after
+        self.serialization_format = 'yaml'  # 'yaml' for human-edited rules, 'json' for machine-consumed shards
+        
+        # Existing rules per domain; several ASVS sections map to the same domain
+        self._domain_cache: Dict[str, List[Dict[str, Any]]] = {}
+        
+        # Domain mapping for ASVS sections (shared, read-only)
+        self.asvs_domain_mapping = ASVS_DOMAIN_MAPPING
         
     def _load_env_file(self):
         """Load environment variables from ../../env/.env file"""
@@ -110,28 +160,29 @@ class DomainBasedASVSGenerator:
     
     def load_existing_domain_rules(self, domain: str) -> List[Dict[str, Any]]:
         """Load existing Rule Cards from a security domain."""
+        if domain in self._domain_cache:
+            return self._domain_cache[domain]
+        
         domain_path = Path("app/rule_cards") / domain
-        existing_rules = []
         
         if not domain_path.exists():
             logger.info(f"Domain directory {domain} does not exist yet")
-            return existing_rules
-        
-        # Find all YAML files in domain directory (including subdirectories)
-        yaml_files = list(domain_path.glob("**/*.yml")) + list(domain_path.glob("**/*.yaml"))
-        
-        for yaml_file in yaml_files:
-            try:
-                with open(yaml_file, 'r', encoding='utf-8') as f:
-                    rule_data = yaml.safe_load(f)
-                    if rule_data and isinstance(rule_data, dict):
-                        rule_data['_source_file'] = str(yaml_file)
-                        existing_rules.append(rule_data)
-            except Exception as e:
-                logger.warning(f"Failed to load rule from {yaml_file}: {e}")
-                continue
+            return []
+        
+        # Find all rule files in domain directory (including subdirectories);
+        # a JSON rule takes precedence over a YAML rule with the same name
+        json_files = list(domain_path.glob("**/*.json"))
+        json_stems = {path.with_suffix('') for path in json_files}
+        yaml_files = [path for path in list(domain_path.glob("**/*.yml")) + list(domain_path.glob("**/*.yaml"))
+                      if path.with_suffix('') not in json_stems]
+        
+        # Load files concurrently; map() keeps the original file order
+        with ThreadPoolExecutor(max_workers=LOAD_WORKERS) as executor:
+            existing_rules = [rule_data for rule_data in executor.map(_load_rule_file, json_files + yaml_files)
+                              if rule_data is not None]
         
         logger.info(f"Loaded {len(existing_rules)} existing rules from {domain} domain")
+        self._domain_cache[domain] = existing_rules
         return existing_rules
     
     def create_domain_integration_prompt(self, 
@@ -215,6 +266,57 @@ Generate the integrated Rule Cards:"""
 
         return prompt
     
+    async def _stream_rule_cards(self, client, prompt: str) -> Tuple[List[Dict[str, Any]], int]:
+        """Stream one completion, parsing each finished YAML document while the rest arrives."""
+        stream = await client.chat.completions.create(
+            model=self.model,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=self.temperature,
+            max_tokens=self.max_tokens,
+            stream=True,
+            stream_options={"include_usage": True}
+        )
+        
+        pending = ""  # Received text not yet handed to the parser
+        parse_tasks = []
+        tokens_used = 0
+        
+        async for chunk in stream:
+            if chunk.usage:  # Final chunk carries usage and no choices
+                tokens_used = chunk.usage.total_tokens
+            if not chunk.choices:
+                continue
+            
+            delta = chunk.choices[0].delta.content or ""
+            pending += delta
+            
+            # Only the tail can hold a separator that was not there before this chunk
+            if DOCUMENT_SEPARATOR in pending[-(len(delta) + len(DOCUMENT_SEPARATOR)):]:
+                complete, _, pending = pending.rpartition(DOCUMENT_SEPARATOR)
+                parse_tasks.append(asyncio.create_task(asyncio.to_thread(self._parse_yaml_rule_cards, complete)))
+        
+        parse_tasks.append(asyncio.create_task(asyncio.to_thread(self._parse_yaml_rule_cards, pending)))
+        parsed = await asyncio.gather(*parse_tasks)
+        
+        return [rule_card for rule_cards in parsed for rule_card in rule_cards], tokens_used
+    
+    async def _complete_prompts(self, prompts: List[str]) -> List[Any]:
+        """Send prompts concurrently; returns (rule_cards, tokens_used) or the raised exception per prompt."""
+        try:
+            from openai import AsyncOpenAI
+        except ImportError:
+            raise ImportError("OpenAI library not available. Install with: pip install openai")
+        
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        
+        # Client scoped to this event loop; the SDK retries 429/5xx with backoff
+        async with AsyncOpenAI(api_key=self.openai_api_key, max_retries=self.max_retries) as client:
+            async def complete(prompt: str):
+                async with semaphore:
+                    return await self._stream_rule_cards(client, prompt)
+            
+            return await asyncio.gather(*(complete(prompt) for prompt in prompts), return_exceptions=True)
+    
     def integrate_asvs_with_domain(self, 
                                   asvs_section: ASVSSection, 
                                   domain: str,
@@ -225,51 +327,39 @@ Generate the integrated Rule Cards:"""
         # Load existing rules from domain
         existing_rules = self.load_existing_domain_rules(domain)
         
-        # Process ASVS requirements in batches
+        # Build one prompt per batch of ASVS requirements
+        requirements = asvs_section.requirements
+        batches = [requirements[i:i + max_requirements_per_batch]
+                   for i in range(0, len(requirements), max_requirements_per_batch)]
+        prompts = [self.create_domain_integration_prompt(batch, existing_rules, domain) for batch in batches]
+        
+        for batch_number, batch in enumerate(batches, 1):
+            logger.info(f"Processing batch {batch_number}: {len(batch)} ASVS requirements")
+        
+        # Call OpenAI API for all batches concurrently
+        responses = asyncio.run(self._complete_prompts(prompts))
+        
         all_integrated_rules = []
         total_tokens = 0
         
-        requirements = asvs_section.requirements
-        for i in range(0, len(requirements), max_requirements_per_batch):
-            batch = requirements[i:i + max_requirements_per_batch]
-            logger.info(f"Processing batch {i//max_requirements_per_batch + 1}: {len(batch)} ASVS requirements")
-            
-            # Create integration prompt
-            prompt = self.create_domain_integration_prompt(batch, existing_rules, domain)
-            
-            # Call OpenAI API
-            try:
-                response = self.openai_client.chat.completions.create(
-                    model=self.model,
-                    messages=[{"role": "user", "content": prompt}],
-                    temperature=self.temperature,
-                    max_tokens=self.max_tokens
-                )
-                
-                content = response.choices[0].message.content
-                tokens_used = response.usage.total_tokens
-                total_tokens += tokens_used
-                
-                # Parse integrated rules
-                batch_rules = self._parse_yaml_rule_cards(content)
-                all_integrated_rules.extend(batch_rules)
-                
-                logger.info(f"Batch {i//max_requirements_per_batch + 1}: Generated {len(batch_rules)} integrated rules")
-                
-            except Exception as e:
-                logger.error(f"Failed to process batch {i//max_requirements_per_batch + 1}: {e}")
+        for batch_number, response in enumerate(responses, 1):
+            if isinstance(response, BaseException):
+                logger.error(f"Failed to process batch {batch_number}: {response}")
                 continue
             
-            # Rate limiting
-            time.sleep(self.rate_limit_delay)
+            # Rules were parsed while the response streamed in
+            batch_rules, tokens_used = response
+            total_tokens += tokens_used
+            all_integrated_rules.extend(batch_rules)
+            
+            logger.info(f"Batch {batch_number}: Generated {len(batch_rules)} integrated rules")
         
         # Analyze integration results
-        new_rules = [r for r in all_integrated_rules if not any(
-            r.get('id') == existing.get('id') for existing in existing_rules
-        )]
-        enhanced_rules = [r for r in all_integrated_rules if any(
-            r.get('id') == existing.get('id') for existing in existing_rules
-        )]
+        existing_ids = {existing.get('id') for existing in existing_rules}
+        new_rules = []
+        enhanced_rules = []
+        for r in all_integrated_rules:
+            (enhanced_rules if r.get('id') in existing_ids else new_rules).append(r)
         
         success = len(all_integrated_rules) > 0
         
@@ -294,39 +384,32 @@ Generate the integrated Rule Cards:"""
     
     def _parse_yaml_rule_cards(self, yaml_content: str) -> List[Dict[str, Any]]:
         """Parse YAML Rule Cards from LLM response."""
+        # Drop code block markers, then parse the multi-document stream in one pass
+        cleaned = _FENCE_RE.sub('', yaml_content)
+        
+        try:
+            return [doc for doc in yaml.load_all(cleaned, Loader=SafeLoader)
+                    if doc and isinstance(doc, dict)]
+        except yaml.YAMLError as e:
+            logger.warning(f"Failed to parse rule cards as one YAML stream, parsing documents separately: {e}")
+        
+        return self._parse_yaml_documents(cleaned)
+    
+    def _parse_yaml_documents(self, yaml_content: str) -> List[Dict[str, Any]]:
+        """Parse "---" separated documents one at a time, skipping malformed ones."""
         rule_cards = []
         
         try:
-            # Handle multiple YAML documents separated by ---
-            yaml_docs = yaml_content.split('---')
-            
-            for doc in yaml_docs:
+            for doc in yaml_content.split('---'):
                 doc = doc.strip()
                 if not doc:
                     continue
                 
-                # Remove code block markers if present
-                if doc.startswith('```yaml'):
-                    doc = doc[7:]
-                if doc.startswith('```'):
-                    doc = doc[3:]
-                if doc.endswith('```'):
-                    doc = doc[:-3]
-                
-                doc = doc.strip()
-                if not doc:
-                    continue
-                
-                # Remove comments and parse
-                lines = doc.split('\n')
-                cleaned_lines = []
-                for line in lines:
-                    if not line.strip().startswith('#'):
-                        cleaned_lines.append(line)
-                cleaned_doc = '\n'.join(cleaned_lines)
+                # Remove full-line comments and parse
+                cleaned_doc = _COMMENT_LINE_RE.sub('', doc)
                 
                 try:
-                    rule_card = yaml.safe_load(cleaned_doc)
+                    rule_card = yaml.load(cleaned_doc, Loader=SafeLoader)
                     if rule_card and isinstance(rule_card, dict):
                         rule_cards.append(rule_card)
                 except yaml.YAMLError as e:
@@ -344,19 +427,27 @@ Generate the integrated Rule Cards:"""
             domain_path = Path("app/rule_cards") / domain
             domain_path.mkdir(parents=True, exist_ok=True)
             
-            saved_count = 0
+            # The domain's rules are about to change on disk; reload them on next use
+            self._domain_cache.pop(domain, None)
             
-            for rule in integrated_rules:
-                rule_id = rule.get('id', f"RULE-{saved_count + 1:03d}")
-                filename = f"{rule_id}.yml"
-                file_path = domain_path / filename
-                
-                # Save rule as YAML
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    yaml.dump(rule, f, default_flow_style=False, sort_keys=False, allow_unicode=True)
-                
-                saved_count += 1
+            # Serialize every rule up front; a later rule with the same ID replaces
+            # an earlier one, as it did when the files were written in order
+            blobs = {}
+            for saved_count, rule in enumerate(integrated_rules, 1):
+                rule_id = rule.get('id', f"RULE-{saved_count:03d}")
+                if self.serialization_format == 'json':
+                    blobs[domain_path / f"{rule_id}.json"] = dump_json_bytes(rule, sort_keys=True)
+                else:
+                    blobs[domain_path / f"{rule_id}.yml"] = yaml.dump(
+                        rule, Dumper=SafeDumper, default_flow_style=False, sort_keys=False,
+                        allow_unicode=True, encoding='utf-8'
+                    )
+            
+            # Write the files concurrently, one open/write/close each
+            with ThreadPoolExecutor(max_workers=LOAD_WORKERS) as executor:
+                list(executor.map(lambda item: item[0].write_bytes(item[1]), blobs.items()))
             
+            saved_count = len(integrated_rules)
             logger.info(f"Saved {saved_count} integrated rules to {domain_path}")
             return True
             
@@ -371,8 +462,28 @@ Generate the integrated Rule Cards:"""
         
         return self.integrate_asvs_with_domain(asvs_section, domain)
     
+    def integrate_domain(self, domain: str, sections: List[ASVSSection]) -> DomainIntegrationResult:
+        """Integrate several ASVS sections that map to the same domain in one pass."""
+        if len(sections) == 1:
+            return self.integrate_asvs_with_domain(sections[0], domain)
+        
+        # Merge the sections so their requirements share batches (and the existing-rules context)
+        combined_section = ASVSSection(
+            id='+'.join(section.id for section in sections),
+            title=', '.join(section.title for section in sections),
+            description='; '.join(section.description for section in sections),
+            url=sections[0].url,
+            requirements=[req for section in sections for req in section.requirements]
+        )
+        
+        return self.integrate_asvs_with_domain(combined_section, domain)
+    
     def run_bulk_domain_integration(self, priority_levels: List[int] = [1, 2]) -> Dict[str, DomainIntegrationResult]:
-        """Run domain-based integration for multiple ASVS sections."""
+        """Run domain-based integration for multiple ASVS sections, returning results by section ID.
+
+        Sections that map to the same domain are integrated in one pass and share that
+        domain's result.
+        """
         logger.info(f"Starting bulk domain integration for ASVS priority levels: {priority_levels}")
         
         # Initialize ASVS fetcher
@@ -385,28 +496,37 @@ Generate the integrated Rule Cards:"""
             logger.error("No ASVS sections fetched")
             return {}
         
+        # Group sections by domain so each domain is integrated once
+        sections_by_domain = defaultdict(list)
+        for section in sections:
+            sections_by_domain[self.get_domain_for_asvs_section(section.id)].append(section)
+        
         results = {}
+        domain_results = {}
         total_tokens = 0
         
-        for section in sections:
-            logger.info(f"Processing ASVS section: {section.title}")
+        for domain, domain_sections in sections_by_domain.items():
+            logger.info(f"Processing {domain} domain: {', '.join(s.title for s in domain_sections)}")
             
-            result = self.process_asvs_section_by_domain(section)
-            results[section.id] = result
+            result = self.integrate_domain(domain, domain_sections)
+            domain_results[domain] = result
+            for section in domain_sections:
+                results[section.id] = result
             
             total_tokens += result.tokens_used
             
-            # Rate limiting between sections
+            # Rate limiting between domains
             time.sleep(self.rate_limit_delay)
         
         # Log summary
-        successful_sections = sum(1 for r in results.values() if r.success)
-        total_new_rules = sum(r.new_rules_created for r in results.values())
-        total_enhanced_rules = sum(r.existing_rules_enhanced for r in results.values())
+        successful_domains = sum(1 for r in domain_results.values() if r.success)
+        total_new_rules = sum(r.new_rules_created for r in domain_results.values())
+        total_enhanced_rules = sum(r.existing_rules_enhanced for r in domain_results.values())
         
         logger.info(f"Domain integration complete:")
-        logger.info(f"  Sections processed: {len(results)}")
-        logger.info(f"  Successful sections: {successful_sections}")
+        logger.info(f"  Sections processed: {len(sections)}")
+        logger.info(f"  Domains processed: {len(domain_results)}")
+        logger.info(f"  Successful domains: {successful_domains}")
         logger.info(f"  New rules created: {total_new_rules}")
         logger.info(f"  Existing rules enhanced: {total_enhanced_rules}")
         logger.info(f"  Total tokens used: {total_tokens}")
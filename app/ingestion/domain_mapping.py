@@ -5,119 +5,232 @@ This module defines the comprehensive mapping between ASVS verification sections
 and security domains for the domain-based Rule Card organization system.
 """
 
-from typing import Dict, List
-from dataclasses import dataclass
+import sys
+from collections import Counter, defaultdict
+from itertools import chain
+from typing import Dict, FrozenSet, List, Sequence, Tuple
+from dataclasses import dataclass, field
+from enum import IntEnum
+from functools import lru_cache
 
-@dataclass
+# dataclass(slots=True) needs Python 3.10+; older interpreters keep a regular __dict__.
+# (Hand-written __slots__ would clash with the is_primary default.)
+_DATACLASS_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+# ASVS 5.0 chapters V1-V17 that the taxonomy must cover
+EXPECTED_ASVS_SECTIONS: FrozenSet[str] = frozenset(f"V{i}" for i in range(1, 18))
+
+class Priority(IntEnum):
+    """Domain priority levels; lower values are more important."""
+    CORE = 1
+    SPECIALIZED = 2
+    ADVANCED = 3
+
+    @property
+    def display_name(self) -> str:
+        return _PRIORITY_DISPLAY_NAMES[self]
+
+_PRIORITY_DISPLAY_NAMES = {
+    Priority.CORE: "Core Security Domains",
+    Priority.SPECIALIZED: "Specialized Domains",
+    Priority.ADVANCED: "Advanced Topics",
+}
+
+@dataclass(frozen=True, **_DATACLASS_SLOTS)
 class DomainMapping:
-    """Configuration for mapping ASVS sections to security domains."""
-    asvs_sections: List[str]
-    owasp_topics: List[str] 
+    """Configuration for mapping ASVS sections to security domains.
+
+    ``asvs_sections`` is given in display order and stored as a frozenset for
+    membership checks; ``asvs_sections_ordered`` keeps that order for rendering.
+    Secondary mappings (``is_primary=False``) extend a section already owned by a
+    primary domain and are left out of section lookups. Instances are immutable
+    and hashable.
+    """
+    name: str
+    asvs_sections: FrozenSet[str]
+    owasp_topics: Tuple[str, ...]
     description: str
-    priority: int  # 1=highest, 3=lowest
+    priority: Priority  # 1=highest, 3=lowest; plain ints are accepted
+    is_primary: bool = True
+    asvs_sections_ordered: Tuple[str, ...] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        sections: Sequence[str] = self.asvs_sections
+        # Frozen dataclass: normalise the declared sequence via object.__setattr__
+        object.__setattr__(self, "asvs_sections_ordered", tuple(dict.fromkeys(sections)))
+        object.__setattr__(self, "asvs_sections", frozenset(sections))
+        object.__setattr__(self, "owasp_topics", tuple(self.owasp_topics))
+        object.__setattr__(self, "priority", Priority(self.priority))
 
-# Comprehensive domain taxonomy based on ASVS 5.0 structure
-DOMAIN_MAPPINGS: Dict[str, DomainMapping] = {
+# Comprehensive domain taxonomy based on ASVS 5.0 structure; the single source
+# of truth that every lookup table below is derived from
+_DOMAINS: Tuple[DomainMapping, ...] = (
     # Priority 1 - Core Security Domains (8 domains)
-    "authentication": DomainMapping(
+    DomainMapping(
+        name="authentication",
         asvs_sections=["V6", "V9", "V10"], 
         owasp_topics=["authentication", "session_management"],
         description="User authentication and identity verification",
-        priority=1
+        priority=Priority.CORE
     ),
     
-    "authorization": DomainMapping(
+    DomainMapping(
+        name="authorization",
         asvs_sections=["V8"],
         owasp_topics=["authorization", "access_control"], 
         description="Access control and privilege management",
-        priority=1
+        priority=Priority.CORE
     ),
     
-    "cryptography": DomainMapping(
+    DomainMapping(
+        name="cryptography",
         asvs_sections=["V11"],
         owasp_topics=["cryptography", "key_management", "hashing", "encryption"],
         description="Cryptographic implementation and key management", 
-        priority=1
+        priority=Priority.CORE
     ),
     
-    "input_validation": DomainMapping(
+    DomainMapping(
+        name="input_validation",
         asvs_sections=["V1", "V2"],
         owasp_topics=["input_validation", "sql_injection_prevention", "business_logic"],
         description="Input validation and business logic security",
-        priority=1
+        priority=Priority.CORE
     ),
     
-    "session_management": DomainMapping(
+    DomainMapping(
+        name="session_management",
         asvs_sections=["V7"],
         owasp_topics=["session_management", "authentication"],
         description="Session lifecycle and security",
-        priority=1
+        priority=Priority.CORE
     ),
     
-    "api_security": DomainMapping(
+    DomainMapping(
+        name="api_security",
         asvs_sections=["V4"], 
         owasp_topics=["api_security", "rest_security"],
         description="REST, GraphQL, and web service security",
-        priority=1
+        priority=Priority.CORE
     ),
     
-    "data_protection": DomainMapping(
+    DomainMapping(
+        name="data_protection",
         asvs_sections=["V14"],
         owasp_topics=["data_protection", "privacy"],
         description="Privacy and data handling requirements",
-        priority=1
+        priority=Priority.CORE
     ),
     
-    "secure_communication": DomainMapping(
+    DomainMapping(
+        name="secure_communication",
         asvs_sections=["V12"],
         owasp_topics=["transport_layer_security", "network_security"],
         description="TLS and network security",
-        priority=1
+        priority=Priority.CORE
     ),
     
     # Priority 2 - Specialized Domains (4 domains)
-    "web_security": DomainMapping(
+    DomainMapping(
+        name="web_security",
         asvs_sections=["V3", "V17"],
         owasp_topics=["web_security", "frontend_security"],
         description="Frontend and client-side security including WebRTC",
-        priority=2
+        priority=Priority.SPECIALIZED
     ),
     
-    "file_handling": DomainMapping(
+    DomainMapping(
+        name="file_handling",
         asvs_sections=["V5"],
         owasp_topics=["file_upload", "file_security"],
         description="File upload and processing security", 
-        priority=2
+        priority=Priority.SPECIALIZED
     ),
     
-    "configuration": DomainMapping(
+    DomainMapping(
+        name="configuration",
         asvs_sections=["V13"],
         owasp_topics=["security_configuration", "hardening"],
         description="Security configuration and hardening",
-        priority=2
+        priority=Priority.SPECIALIZED
     ),
     
-    "logging": DomainMapping(
+    DomainMapping(
+        name="logging",
         asvs_sections=["V16"],
         owasp_topics=["logging", "error_handling"],
         description="Security logging and error handling",
-        priority=2
+        priority=Priority.SPECIALIZED
     ),
     
     # Priority 3 - Advanced Topics (2 domains)  
-    "secure_coding": DomainMapping(
+    DomainMapping(
+        name="secure_coding",
         asvs_sections=["V15"],
         owasp_topics=["secure_coding", "architectural_patterns"],
         description="Architectural patterns and development practices",
-        priority=3
+        priority=Priority.ADVANCED
     ),
     
-    "network_security": DomainMapping(
+    DomainMapping(
+        name="network_security",
         asvs_sections=["V12"],  # Additional network requirements beyond TLS
         owasp_topics=["network_security", "infrastructure_security"],
         description="Advanced network-layer protections",
-        priority=3
+        priority=Priority.ADVANCED,
+        is_primary=False
     )
+)
+
+DOMAIN_MAPPINGS: Dict[str, DomainMapping] = {mapping.name: mapping for mapping in _DOMAINS}
+
+# Machine-readable form of DOMAIN_MAPPINGS, ready for json serialization
+DOMAIN_CONFIG_JSON: Dict[str, Dict[str, object]] = {
+    mapping.name: {
+        "asvs_sections": list(mapping.asvs_sections_ordered),
+        "owasp_topics": list(mapping.owasp_topics),
+        "description": mapping.description,
+        "priority": int(mapping.priority),
+        "is_primary": mapping.is_primary
+    }
+    for mapping in _DOMAINS
+}
+
+def _build_section_index() -> Dict[str, str]:
+    """Reverse index ASVS section -> primary domain; the first primary domain listing a section wins."""
+    index: Dict[str, str] = {}
+    for mapping in _DOMAINS:
+        if not mapping.is_primary:
+            continue
+        for section in mapping.asvs_sections_ordered:
+            index.setdefault(section, mapping.name)
+    return index
+
+# Built once at import (V12 -> secure_communication; network_security is secondary)
+_SECTION_TO_DOMAIN = _build_section_index()
+
+def _build_topic_index() -> Dict[str, Tuple[str, ...]]:
+    """Reverse index OWASP topic -> every domain listing it, in declaration order."""
+    index: Dict[str, List[str]] = defaultdict(list)
+    for mapping in _DOMAINS:
+        for topic in mapping.owasp_topics:
+            index[topic].append(mapping.name)
+    return {topic: tuple(domains) for topic, domains in index.items()}
+
+# Built once at import; topics such as "authentication" belong to several domains
+_TOPIC_TO_DOMAINS = _build_topic_index()
+
+def _group_by_priority() -> Dict[Priority, Tuple[Tuple[str, DomainMapping], ...]]:
+    """Group (domain, mapping) pairs by priority level, keeping declaration order."""
+    groups: Dict[Priority, List[Tuple[str, DomainMapping]]] = {priority: [] for priority in Priority}
+    for mapping in _DOMAINS:
+        groups[mapping.priority].append((mapping.name, mapping))
+    return {priority: tuple(items) for priority, items in groups.items()}
+
+# Priority buckets, built once at import and shared by lookups and documentation
+MAPPINGS_BY_PRIORITY = _group_by_priority()
+DOMAINS_BY_PRIORITY: Dict[Priority, Tuple[str, ...]] = {
+    priority: tuple(domain for domain, _ in items) for priority, items in MAPPINGS_BY_PRIORITY.items()
 }
 
 def get_domain_for_asvs_section(asvs_section: str) -> str:
@@ -130,10 +243,19 @@ def get_domain_for_asvs_section(asvs_section: str) -> str:
     Returns:
         Domain name or 'unknown' if not found
     """
-    for domain, mapping in DOMAIN_MAPPINGS.items():
-        if asvs_section in mapping.asvs_sections:
-            return domain
-    return "unknown"
+    return _SECTION_TO_DOMAIN.get(asvs_section, "unknown")
+
+def get_domains_for_owasp_topic(topic: str) -> List[str]:
+    """
+    Get all domains that cover a given OWASP topic.
+    
+    Args:
+        topic: OWASP topic identifier (e.g., 'authentication', 'network_security')
+        
+    Returns:
+        List of domain names, empty if the topic is not mapped
+    """
+    return list(_TOPIC_TO_DOMAINS.get(topic, ()))
 
 def get_priority_domains(priority: int) -> List[str]:
     """
@@ -145,33 +267,39 @@ def get_priority_domains(priority: int) -> List[str]:
     Returns:
         List of domain names for that priority
     """
-    return [domain for domain, mapping in DOMAIN_MAPPINGS.items() 
-            if mapping.priority == priority]
+    return list(DOMAINS_BY_PRIORITY.get(priority, ()))
 
 def get_all_domains() -> List[str]:
     """Get all defined security domains."""
     return list(DOMAIN_MAPPINGS.keys())
 
+@lru_cache(maxsize=1)
+def _validate_snapshot(snapshot: Tuple[Tuple[bool, FrozenSet[str]], ...]) -> Dict[str, Tuple[str, ...]]:
+    """Validate a (is_primary, asvs_sections) snapshot of the domain mapping."""
+    primary = [sections for is_primary, sections in snapshot if is_primary]
+    secondary = [sections for is_primary, sections in snapshot if not is_primary]
+    
+    # Each domain's sections are a set, so a section counted twice is claimed by two
+    # primary domains; overlaps from secondary domains are expected
+    section_counts = Counter(chain.from_iterable(primary))
+    
+    # Check for missing V1-V17 coverage
+    return {
+        "missing_sections": tuple(sorted(EXPECTED_ASVS_SECTIONS.difference(section_counts))),
+        "duplicate_sections": tuple(section for section, count in section_counts.items() if count > 1),
+        "secondary_sections": tuple(sorted(set(chain.from_iterable(secondary)))),
+    }
+
 def validate_domain_mapping() -> Dict[str, List[str]]:
     """
     Validate domain mapping for completeness and conflicts.
     
+    The result is cached per snapshot of the mapping, so repeat calls are cheap
+    and changes to DOMAIN_MAPPINGS are still picked up.
+    
     Returns:
         Dictionary with any validation issues found
     """
-    issues = {"missing_sections": [], "duplicate_sections": []}
-    
-    # Check for ASVS sections V1-V17 coverage
-    all_sections = set()
-    for mapping in DOMAIN_MAPPINGS.values():
-        for section in mapping.asvs_sections:
-            if section in all_sections:
-                issues["duplicate_sections"].append(section)
-            all_sections.add(section)
-    
-    # Check for missing V1-V17 coverage
-    expected_sections = {f"V{i}" for i in range(1, 18)}
-    missing = expected_sections - all_sections
-    issues["missing_sections"] = list(missing)
-    
-    return issues
\ No newline at end of file
+    snapshot = tuple((m.is_primary, m.asvs_sections) for m in DOMAIN_MAPPINGS.values())
+    # Fresh lists per call so callers can't mutate the cached result
+    return {key: list(sections) for key, sections in _validate_snapshot(snapshot).items()}
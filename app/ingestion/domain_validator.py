@@ -5,14 +5,30 @@ Validates the domain mapping configuration and generates documentation
 for the domain-based Rule Card organization system.
 """
 
-import json
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List, Any
-from .domain_mapping import DOMAIN_MAPPINGS, validate_domain_mapping, get_all_domains
-
-def generate_domain_taxonomy_documentation() -> str:
-    """Generate comprehensive domain taxonomy documentation."""
-    doc = """# Security Domain Taxonomy
+from typing import Any, Dict, Iterator, List
+from .domain_mapping import (
+    DOMAIN_CONFIG_JSON, DOMAIN_MAPPINGS, DOMAINS_BY_PRIORITY, Priority,
+    validate_domain_mapping, get_all_domains
+)
+from .json_bytes import dump_json_bytes
+
+# Per-domain documentation blocks, rendered once at import from the immutable mappings
+_RENDERED_DOMAIN_BLOCKS: Dict[str, str] = {
+    domain: (
+        f"**{domain}**\n"
+        f"- Description: {mapping.description}\n"
+        f"- ASVS Sections: {', '.join(mapping.asvs_sections_ordered)}\n"
+        f"- OWASP Topics: {', '.join(mapping.owasp_topics)}\n"
+        f"- Directory: `app/rule_cards/{domain}/`\n\n"
+    )
+    for domain, mapping in DOMAIN_MAPPINGS.items()
+}
+
+def iter_taxonomy_documentation() -> Iterator[str]:
+    """Yield the domain taxonomy documentation piece by piece."""
+    yield """# Security Domain Taxonomy
 
 ## Overview
 This document defines the comprehensive domain mapping for organizing Rule Cards by security topic rather than by source standard (OWASP, ASVS, etc.).
@@ -21,48 +37,49 @@ This document defines the comprehensive domain mapping for organizing Rule Cards
 
 """
     
-    # Group domains by priority
-    priority_groups = {1: [], 2: [], 3: []}
-    for domain, mapping in DOMAIN_MAPPINGS.items():
-        priority_groups[mapping.priority].append((domain, mapping))
-    
-    for priority in [1, 2, 3]:
-        priority_name = {1: "Core Security Domains", 2: "Specialized Domains", 3: "Advanced Topics"}[priority]
-        doc += f"### Priority {priority} - {priority_name}\n\n"
+    for priority in Priority:
+        yield f"### Priority {priority.value} - {priority.display_name}\n\n"
         
-        for domain, mapping in priority_groups[priority]:
-            doc += f"**{domain}**\n"
-            doc += f"- Description: {mapping.description}\n"
-            doc += f"- ASVS Sections: {', '.join(mapping.asvs_sections)}\n"
-            doc += f"- OWASP Topics: {', '.join(mapping.owasp_topics)}\n"
-            doc += f"- Directory: `app/rule_cards/{domain}/`\n\n"
+        for domain in DOMAINS_BY_PRIORITY[priority]:
+            yield _RENDERED_DOMAIN_BLOCKS[domain]
     
     # Validation results
     validation_results = validate_domain_mapping()
-    doc += "## Validation Results\n\n"
+    yield "## Validation Results\n\n"
     
     if not validation_results['missing_sections'] and not validation_results['duplicate_sections']:
-        doc += "✅ All ASVS sections V1-V17 are properly mapped with no duplicates.\n\n"
+        yield "✅ All ASVS sections V1-V17 are properly mapped with no duplicates.\n\n"
     else:
         if validation_results['missing_sections']:
-            doc += f"❌ Missing ASVS sections: {', '.join(validation_results['missing_sections'])}\n"
+            yield f"❌ Missing ASVS sections: {', '.join(validation_results['missing_sections'])}\n"
         if validation_results['duplicate_sections']:
-            doc += f"❌ Duplicate ASVS sections: {', '.join(validation_results['duplicate_sections'])}\n"
-        doc += "\n"
-    
+            yield f"❌ Duplicate ASVS sections: {', '.join(validation_results['duplicate_sections'])}\n"
+        yield "\n"
+
+    if validation_results['secondary_sections']:
+        yield f"ℹ️ Secondary ASVS sections (extend a primary domain): {', '.join(validation_results['secondary_sections'])}\n\n"
+
     # Domain statistics  
-    doc += "## Domain Statistics\n\n"
-    doc += f"- Total domains: {len(DOMAIN_MAPPINGS)}\n"
-    doc += f"- Priority 1 domains: {len(priority_groups[1])}\n"
-    doc += f"- Priority 2 domains: {len(priority_groups[2])}\n"
-    doc += f"- Priority 3 domains: {len(priority_groups[3])}\n"
-    doc += f"- Total ASVS sections covered: {sum(len(m.asvs_sections) for m in DOMAIN_MAPPINGS.values())}\n\n"
-    
-    return doc
+    yield (
+        "## Domain Statistics\n\n"
+        f"- Total domains: {len(DOMAIN_MAPPINGS)}\n"
+        f"- Priority 1 domains: {len(DOMAINS_BY_PRIORITY[Priority.CORE])}\n"
+        f"- Priority 2 domains: {len(DOMAINS_BY_PRIORITY[Priority.SPECIALIZED])}\n"
+        f"- Priority 3 domains: {len(DOMAINS_BY_PRIORITY[Priority.ADVANCED])}\n"
+        f"- Total ASVS sections covered: {sum(len(m.asvs_sections) for m in DOMAIN_MAPPINGS.values())}\n\n"
+    )
+
+# The generators depend only on the static domain mapping, so their output is cached;
+# call .cache_clear() after changing DOMAIN_MAPPINGS at runtime.
+@lru_cache(maxsize=1)
+def generate_domain_taxonomy_documentation() -> str:
+    """Generate comprehensive domain taxonomy documentation."""
+    return "".join(iter_taxonomy_documentation())
 
+@lru_cache(maxsize=1)
 def generate_domain_migration_plan() -> str:
     """Generate migration plan for existing OWASP rules to domain structure."""
-    plan = """# Domain Migration Plan
+    parts = ["""# Domain Migration Plan
 
 ## Overview
 Migration strategy for reorganizing existing source-based Rule Cards to domain-based structure.
@@ -78,13 +95,12 @@ app/rule_cards/
 ## Target State
 ```
 app/rule_cards/
-"""
+"""]
     
     # Add domain directories
-    for domain in sorted(get_all_domains()):
-        plan += f"├── {domain}/\n"
+    parts.extend(f"├── {domain}/\n" for domain in sorted(get_all_domains()))
     
-    plan += """```
+    parts.append("""```
 
 ## Migration Steps
 
@@ -94,19 +110,14 @@ app/rule_cards/
 3. Validate no rules are lost during mapping
 
 ### Phase 2: Domain-by-Domain Migration
-"""
+""")
     
     # Add migration steps for each priority level
-    priority_groups = {1: [], 2: [], 3: []}
-    for domain, mapping in DOMAIN_MAPPINGS.items():
-        priority_groups[mapping.priority].append(domain)
+    for priority in Priority:
+        parts.append(f"\n**Priority {priority.value} Domains:**\n")
+        parts.extend(f"- Migrate rules to `app/rule_cards/{domain}/`\n" for domain in sorted(DOMAINS_BY_PRIORITY[priority]))
     
-    for priority in [1, 2, 3]:
-        plan += f"\n**Priority {priority} Domains:**\n"
-        for domain in sorted(priority_groups[priority]):
-            plan += f"- Migrate rules to `app/rule_cards/{domain}/`\n"
-    
-    plan += """
+    parts.append("""
 ### Phase 3: Validation and Cleanup
 1. Validate all original rules successfully migrated
 2. Update semantic search corpus paths
@@ -117,18 +128,17 @@ app/rule_cards/
 1. Backup created before migration in `app/rule_cards/.backup/`
 2. Git branch protection ensures full history preservation
 3. Validation scripts verify no data loss at each step
-"""
+""")
     
-    return plan
+    return "".join(parts)
 
 def save_documentation(output_dir: Path = Path("docs/domain_taxonomy/")):
     """Save generated documentation to files."""
     output_dir.mkdir(parents=True, exist_ok=True)
     
     # Save taxonomy documentation
-    taxonomy_doc = generate_domain_taxonomy_documentation()
-    with open(output_dir / "domain_taxonomy.md", "w", encoding="utf-8") as f:
-        f.write(taxonomy_doc)
+    with open(output_dir / "domain_taxonomy.md", "w", encoding="utf-8", buffering=1 << 16) as f:
+        f.writelines(iter_taxonomy_documentation())
     
     # Save migration plan
     migration_plan = generate_domain_migration_plan()
@@ -136,17 +146,7 @@ def save_documentation(output_dir: Path = Path("docs/domain_taxonomy/")):
         f.write(migration_plan)
     
     # Save machine-readable domain mapping
-    domain_config = {}
-    for domain, mapping in DOMAIN_MAPPINGS.items():
-        domain_config[domain] = {
-            "asvs_sections": mapping.asvs_sections,
-            "owasp_topics": mapping.owasp_topics,
-            "description": mapping.description,
-            "priority": mapping.priority
-        }
-    
-    with open(output_dir / "domain_mapping.json", "w", encoding="utf-8") as f:
-        json.dump(domain_config, f, indent=2, ensure_ascii=False)
+    (output_dir / "domain_mapping.json").write_bytes(dump_json_bytes(DOMAIN_CONFIG_JSON))
     
     print(f"✅ Documentation saved to {output_dir}")
     print(f"   - domain_taxonomy.md: Comprehensive domain mapping")
@@ -6,9 +6,8 @@ Part of Story 2.5.1: ASVS Domain-Based Integration - Phase 2
 """
 
 import os
-import shutil
-from pathlib import Path
-from owasp_domain_migration import OwaspDomainMigrator
+from concurrent.futures import ThreadPoolExecutor
+from owasp_domain_migration import OwaspDomainMigrator, count_rule_files
 
 def execute_migration():
     """Execute the OWASP to domain migration"""
@@ -23,10 +22,22 @@ def execute_migration():
         "web_security", "file_handling", "configuration", "logging", "secure_coding"
     ]
     
-    for domain in missing_domains:
-        domain_dir = migrator.rule_cards_path / domain
-        domain_dir.mkdir(exist_ok=True)
-        print(f"  ✓ Created {domain_dir}")
+    domain_dirs = [migrator.rule_cards_path / domain for domain in missing_domains]
+    
+    # One directory scan tells us which domains already exist, so reruns skip mkdir entirely
+    with os.scandir(migrator.rule_cards_path) as entries:
+        existing = {entry.name for entry in entries if entry.is_dir(follow_symlinks=False)}
+    to_create = [domain_dir for domain_dir in domain_dirs if domain_dir.name not in existing]
+    
+    # Directory setup and verification are independent per domain, so overlap the syscalls;
+    # results are printed after each pool drains to keep output order stable
+    if to_create:
+        with ThreadPoolExecutor(max_workers=len(to_create)) as executor:
+            list(executor.map(lambda domain_dir: domain_dir.mkdir(exist_ok=True), to_create))
+    print("\n".join(
+        f"  · Exists {domain_dir}" if domain_dir.name in existing else f"  ✓ Created {domain_dir}"
+        for domain_dir in domain_dirs
+    ))
     
     # Execute actual migration
     print("\nMigrating OWASP rules to domains...")
@@ -40,23 +51,24 @@ def execute_migration():
     
     if migration_results["errors"]:
         print("Errors:")
-        for error in migration_results["errors"]:
-            print(f"  ❌ {error}")
+        print("\n".join(f"  ❌ {error}" for error in migration_results["errors"]))
     
-    # Detailed migration summary
-    total_migrated = 0
-    for migration in migration_results["migrations"]:
-        total_migrated += migration["rule_count"]
-        print(f"  ✓ {migration['source']} → {migration['target_domain']} ({migration['rule_count']} rules)")
+    # Detailed migration summary, emitted as one block
+    total_migrated = sum(migration["rule_count"] for migration in migration_results["migrations"])
+    migration_lines = [
+        f"  ✓ {migration['source']} → {migration['target_domain']} ({migration['rule_count']} rules)"
+        for migration in migration_results["migrations"]
+    ]
+    if migration_lines:
+        print("\n".join(migration_lines))
     
     print(f"\nTotal rules migrated: {total_migrated}")
     
     # Verify migration
     print("\n=== Post-Migration Verification ===")
-    for domain in missing_domains:
-        domain_dir = migrator.rule_cards_path / domain
-        rule_count = len(list(domain_dir.glob("*.yml")))
-        print(f"  {domain}: {rule_count} rules")
+    with ThreadPoolExecutor(max_workers=len(domain_dirs)) as executor:
+        rule_counts = list(executor.map(count_rule_files, domain_dirs))
+    print("\n".join(f"  {domain}: {rule_count} rules" for domain, rule_count in zip(missing_domains, rule_counts)))
     
     print("\n✅ Migration completed successfully!")
     return migration_results
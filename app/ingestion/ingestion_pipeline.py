@@ -5,29 +5,98 @@ OWASP Cheat Sheet Ingestion Pipeline
 End-to-end automated ingestion pipeline that orchestrates the complete
 OWASP cheat sheet to Rule Card to semantic search corpus workflow.
 
+Run from the project root as a module:
+    python -m app.ingestion.ingestion_pipeline
+
 Task 5: Ingestion Pipeline and Automation for Story 2.5
 """
 
 import os
 import sys
+import re
 import json
+import asyncio
 import logging
 import hashlib
+import shutil
+import subprocess
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Dict, List, Any, Optional, Tuple
 
-# Add project root to path
-project_root = Path(__file__).parent.parent.parent
-sys.path.append(str(project_root))
+import yaml
 
 from app.ingestion.owasp_fetcher import OWASPFetcher
-from app.ingestion.llm_rule_generator import LLMRuleCardGenerator
+from app.ingestion.llm_rule_generator import GenerationResult, LLMRuleCardGenerator
 from app.ingestion.scanner_mapper import SecurityScannerMapper
-from app.ingestion.corpus_integration import OWASPCorpusIntegrator
+from app.ingestion.corpus_integration import OWASPCorpusIntegrator, _iter_yaml
+from app.ingestion.json_bytes import dump_json_bytes, parse_json_bytes
 
 logger = logging.getLogger(__name__)
 
+# Top-level "id:" line of a Rule Card; avoids a full YAML parse just to read the ID
+_ID_RE = re.compile(rb'^id:[ \t]*["\']?([^"\'\r\n]+)', re.M)
+_ID_SCAN_BYTES = 4096
+# Sidecar cache of {path: [mtime_ns, id]} kept inside the rule cards directory
+ID_INDEX_FILE = ".id_index.json"
+
+
+def _read_rule_id(yaml_file: str) -> Optional[str]:
+    """Read a Rule Card's ID, scanning the first few KB before falling back to the whole file."""
+    with open(yaml_file, 'rb') as f:
+        match = _ID_RE.search(f.read(_ID_SCAN_BYTES))
+        if match is None:
+            f.seek(0)
+            match = _ID_RE.search(f.read())
+    if match is None:
+        return None
+    # Drop a trailing comment or closing quote left by the simple pattern
+    return match.group(1).split(b' #', 1)[0].decode('utf-8').strip().strip('"\'') or None
+
+
+def _snapshot_tree(src: str, dest: str) -> None:
+    """Copy a directory tree for backup, sharing data blocks where the filesystem allows.
+
+    GNU cp --reflink=auto clones files copy-on-write on Btrfs/XFS and falls back to a
+    regular in-kernel copy elsewhere. Hardlinks are deliberately avoided: rule cards are
+    rewritten in place, which would silently change the backup as well.
+    """
+    if sys.platform.startswith("linux") and shutil.which("cp"):
+        try:
+            subprocess.run(["cp", "-R", "--reflink=auto", src, dest], check=True, capture_output=True, timeout=300)
+            return
+        except (subprocess.CalledProcessError, subprocess.TimeoutExpired, OSError) as e:
+            logger.debug(f"cp --reflink snapshot failed, falling back to copytree: {e}")
+            shutil.rmtree(dest, ignore_errors=True)
+    shutil.copytree(src, dest)
+
+
+# Rule Card quality checks as (predicate, weight) pairs, scanned once per rule
+_QUALITY_CHECKS = (
+    # Required fields presence (40% of score)
+    (lambda rule: bool(rule.get('id')), 0.8),
+    (lambda rule: bool(rule.get('title')), 0.8),
+    (lambda rule: bool(rule.get('severity')), 0.8),
+    (lambda rule: bool(rule.get('scope')), 0.8),
+    (lambda rule: bool(rule.get('requirement')), 0.8),
+    # Content quality (30% of score)
+    (lambda rule: isinstance(rule.get('do'), list) and len(rule['do']) > 0, 1.0),
+    (lambda rule: isinstance(rule.get('dont'), list) and len(rule['dont']) > 0, 1.0),
+    (lambda rule: isinstance(rule.get('detect'), dict), 1.0),
+    # Metadata quality (20% of score)
+    (lambda rule: isinstance(rule.get('refs'), dict) and ('cwe' in rule['refs'] or 'owasp' in rule['refs']), 1.0),
+    (lambda rule: 'verify' in rule, 1.0),
+    # Title and requirement quality (10% of score)
+    (lambda rule: 'title' in rule and len(rule['title']) > 10, 0.5),
+    (lambda rule: 'requirement' in rule and len(rule['requirement']) > 20, 0.5),
+)
+_QUALITY_MAX_SCORE = 10.0
+
+
+def _score_rule(rule: Dict[str, Any]) -> float:
+    """Quality score of a single Rule Card in [0, 1]."""
+    return sum(weight for check, weight in _QUALITY_CHECKS if check(rule)) / _QUALITY_MAX_SCORE
+
 
 class PipelineConfig:
     """Configuration for the ingestion pipeline."""
@@ -67,8 +136,7 @@ class PipelineConfig:
         # Try to load configuration file if it exists
         if os.path.exists(self.config_path):
             try:
-                with open(self.config_path, 'r') as f:
-                    user_config = json.load(f)
+                user_config = parse_json_bytes(Path(self.config_path).read_bytes())
                 # Merge user config with defaults
                 self._deep_merge(default_config, user_config)
             except Exception as e:
@@ -157,6 +225,9 @@ class OWASPIngestionPipeline:
         self.scanner_mapper = SecurityScannerMapper()
         self.corpus_integrator = OWASPCorpusIntegrator()
         
+        # Upper bound on in-flight OpenAI requests during Rule Card generation
+        self.max_concurrent_requests = max(1, int(self.config.config["pipeline"].get("max_concurrent_requests", 2)))
+        
         # Setup logging
         self._setup_logging()
         
@@ -197,8 +268,7 @@ class OWASPIngestionPipeline:
             
             # Copy existing rule cards if they exist
             if os.path.exists(rule_cards_path):
-                import shutil
-                shutil.copytree(rule_cards_path, os.path.join(backup_dir, "rule_cards"))
+                _snapshot_tree(rule_cards_path, os.path.join(backup_dir, "rule_cards"))
                 logger.info(f"Backed up existing rule cards to {backup_dir}")
                 
             return True
@@ -222,15 +292,17 @@ class OWASPIngestionPipeline:
             # Ensure output directory exists
             os.makedirs(rule_cards_path, exist_ok=True)
             
-            # Test write permissions
-            test_file = os.path.join(rule_cards_path, ".pipeline_test")
-            try:
-                with open(test_file, 'w') as f:
-                    f.write("test")
-                os.remove(test_file)
-            except Exception as e:
-                self.state.add_error(f"No write access to output directory: {e}")
-                return False
+            # Test write permissions; os.access answers without touching the disk, and a
+            # real probe write is only attempted when it says no (e.g. ACL or NFS setups)
+            if not os.access(rule_cards_path, os.W_OK):
+                test_file = os.path.join(rule_cards_path, ".pipeline_test")
+                try:
+                    with open(test_file, 'w') as f:
+                        f.write("test")
+                    os.remove(test_file)
+                except Exception as e:
+                    self.state.add_error(f"No write access to output directory: {e}")
+                    return False
                 
             logger.info("Prerequisites validation passed")
             return True
@@ -239,6 +311,40 @@ class OWASPIngestionPipeline:
             self.state.add_error(f"Prerequisites validation failed: {e}")
             return False
     
+    def _load_existing_rule_ids(self, rule_cards_path: str) -> set:
+        """Collect existing Rule Card IDs, re-reading only files changed since the last run.
+        
+        IDs are cached in a sidecar index (ID_INDEX_FILE) keyed by path and mtime.
+        """
+        index_file = os.path.join(rule_cards_path, ID_INDEX_FILE)
+        try:
+            with open(index_file, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            cached = {}
+        
+        index = {}
+        for entry in _iter_yaml(rule_cards_path):
+            try:
+                mtime_ns = entry.stat().st_mtime_ns
+                hit = cached.get(entry.path)
+                if hit is not None and hit[0] == mtime_ns:
+                    index[entry.path] = hit
+                else:
+                    index[entry.path] = [mtime_ns, _read_rule_id(entry.path)]
+            except (OSError, UnicodeDecodeError):
+                continue
+        
+        # Rewrite the index only when files were added, changed or removed
+        if index != cached and os.path.isdir(rule_cards_path):
+            try:
+                with open(index_file, 'w', encoding='utf-8') as f:
+                    json.dump(index, f)
+            except OSError as e:
+                logger.debug(f"Could not update rule ID index {index_file}: {e}")
+        
+        return {rule_id for _, rule_id in index.values() if rule_id}
+    
     def _detect_duplicate_rule_cards(self, new_rules: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Detect and handle duplicate rule cards."""
         validation_config = self.config.config["validation"]
@@ -246,20 +352,8 @@ class OWASPIngestionPipeline:
             return new_rules
             
         # Load existing rule IDs
-        existing_ids = set()
         rule_cards_path = self.config.config["output"]["rule_cards_path"]
-        
-        if os.path.exists(rule_cards_path):
-            import glob
-            for yaml_file in glob.glob(os.path.join(rule_cards_path, "**", "*.yml"), recursive=True):
-                try:
-                    import yaml
-                    with open(yaml_file, 'r') as f:
-                        rule_data = yaml.safe_load(f)
-                        if rule_data and 'id' in rule_data:
-                            existing_ids.add(rule_data['id'])
-                except Exception:
-                    continue
+        existing_ids = self._load_existing_rule_ids(rule_cards_path)
         
         # Filter out duplicates
         unique_rules = []
@@ -277,10 +371,59 @@ class OWASPIngestionPipeline:
             
         return unique_rules
     
+    def _generation_result_to_dict(self, result: GenerationResult) -> Dict[str, Any]:
+        """Convert a GenerationResult into the result dict used by later pipeline steps."""
+        rule_cards = []
+        for card in result.rule_cards:
+            try:
+                rule = yaml.safe_load(card)
+            except yaml.YAMLError as e:
+                self.state.add_warning(f"Skipping unparseable rule card: {e}")
+                continue
+            if isinstance(rule, dict):
+                rule_cards.append(rule)
+        
+        return {
+            "success": result.success,
+            "rule_cards": rule_cards,
+            "error_message": result.error_message,
+            "tokens_used": result.tokens_used,
+            "processing_time": result.processing_time
+        }
+    
+    async def _generate_all_async(self, cheat_sheets: Dict[str, str]) -> Dict[str, Dict[str, Any]]:
+        """Generate Rule Cards for every cheat sheet concurrently, keyed by sheet ID."""
+        try:
+            import httpx
+        except ImportError:
+            raise ImportError("httpx library not available. Install with: pip install httpx")
+        
+        sheet_ids = list(cheat_sheets)
+        # Created inside the running loop; caps concurrent calls at the configured limit
+        semaphore = asyncio.Semaphore(self.max_concurrent_requests)
+        limits = httpx.Limits(max_connections=self.max_concurrent_requests)
+        
+        async with httpx.AsyncClient(limits=limits) as client:
+            async def generate(sheet_id: str) -> GenerationResult:
+                async with semaphore:
+                    return await self.llm_generator.generate_rule_cards_async(client, cheat_sheets[sheet_id], sheet_id)
+            
+            results = await asyncio.gather(*(generate(sheet_id) for sheet_id in sheet_ids), return_exceptions=True)
+        
+        generated_results = {}
+        for sheet_id, result in zip(sheet_ids, results):
+            if isinstance(result, BaseException):
+                self.state.add_error(f"Rule Card generation failed for {sheet_id}: {result}")
+                generated_results[sheet_id] = {"success": False, "rule_cards": [], "error_message": str(result)}
+            else:
+                generated_results[sheet_id] = self._generation_result_to_dict(result)
+        return generated_results
+    
     def _validate_rule_quality(self, rules: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Validate rule card quality against threshold."""
         validation_config = self.config.config["validation"]
         quality_threshold = validation_config.get("quality_threshold", 0.8)
+        max_failures_percent = validation_config.get("max_failures_percent", 20)
         
         quality_rules = []
         failed_count = 0
@@ -294,51 +437,19 @@ class OWASPIngestionPipeline:
             else:
                 failed_count += 1
                 self.state.add_warning(f"Rule {rule.get('id')} failed quality check (score: {quality_score:.2f})")
-        
-        # Check if failure rate exceeds threshold
-        max_failures_percent = validation_config.get("max_failures_percent", 20)
-        if rules:  # Avoid division by zero
-            failure_rate = (failed_count / len(rules)) * 100
-            if failure_rate > max_failures_percent:
-                self.state.add_error(f"Quality failure rate ({failure_rate:.1f}%) exceeds threshold ({max_failures_percent}%)")
-                return []
+                
+                # Failures only accumulate, so stop as soon as the batch can no longer pass
+                if failed_count * 100 > max_failures_percent * len(rules):
+                    failure_rate = (failed_count / len(rules)) * 100
+                    self.state.add_error(f"Quality failure rate (at least {failure_rate:.1f}%) exceeds threshold ({max_failures_percent}%)")
+                    return []
         
         logger.info(f"Quality validation passed: {len(quality_rules)}/{len(rules)} rules meet quality threshold")
         return quality_rules
     
     def _calculate_rule_quality_score(self, rule: Dict[str, Any]) -> float:
         """Calculate a quality score for a rule card."""
-        score = 0.0
-        max_score = 10.0
-        
-        # Required fields presence (40% of score)
-        required_fields = ['id', 'title', 'severity', 'scope', 'requirement']
-        for field in required_fields:
-            if field in rule and rule[field]:
-                score += 0.8
-        
-        # Content quality (30% of score)
-        if 'do' in rule and isinstance(rule['do'], list) and len(rule['do']) > 0:
-            score += 1.0
-        if 'dont' in rule and isinstance(rule['dont'], list) and len(rule['dont']) > 0:
-            score += 1.0
-        if 'detect' in rule and isinstance(rule['detect'], dict):
-            score += 1.0
-            
-        # Metadata quality (20% of score)
-        if 'refs' in rule and isinstance(rule['refs'], dict):
-            if 'cwe' in rule['refs'] or 'owasp' in rule['refs']:
-                score += 1.0
-        if 'verify' in rule:
-            score += 1.0
-            
-        # Title and requirement quality (10% of score)
-        if 'title' in rule and len(rule['title']) > 10:
-            score += 0.5
-        if 'requirement' in rule and len(rule['requirement']) > 20:
-            score += 0.5
-            
-        return score / max_score
+        return _score_rule(rule)
     
     def _save_pipeline_report(self) -> bool:
         """Save pipeline execution report."""
@@ -363,8 +474,7 @@ class OWASPIngestionPipeline:
             }
             
             # Save report
-            with open(report_file, 'w') as f:
-                json.dump(report, f, indent=2)
+            Path(report_file).write_bytes(dump_json_bytes(report))
                 
             logger.info(f"Pipeline report saved to {report_file}")
             return True
@@ -393,16 +503,22 @@ class OWASPIngestionPipeline:
             # Step 2: Fetch OWASP cheat sheets
             logger.info("Step 2: Fetching OWASP cheat sheets...")
             if cheat_sheet_urls is None:
-                cheat_sheets = self.owasp_fetcher.get_prioritized_cheat_sheets()
+                cheat_sheets = self.owasp_fetcher.fetch_secure_coding_cheatsheets()
             else:
-                cheat_sheets = [{"url": url, "title": f"Custom-{i}"} for i, url in enumerate(cheat_sheet_urls)]
+                # A bad URL is recorded against its sheet instead of aborting the run
+                cheat_sheets = {}
+                for i, url in enumerate(cheat_sheet_urls):
+                    try:
+                        cheat_sheets[f"Custom-{i}"] = self.owasp_fetcher.fetch_cheatsheet(url)
+                    except RuntimeError as e:
+                        self.state.add_error(f"Cheat sheet fetch failed for Custom-{i}: {e}")
                 
             self.state.total_cheat_sheets = len(cheat_sheets)
             logger.info(f"Found {len(cheat_sheets)} cheat sheets to process")
             
-            # Step 3: Generate Rule Cards using LLM
+            # Step 3: Generate Rule Cards using LLM, all cheat sheets in flight at once
             logger.info("Step 3: Generating Rule Cards with ChatGPT...")
-            generated_results = self.llm_generator.generate_bulk_rule_cards()
+            generated_results = asyncio.run(self._generate_all_async(cheat_sheets))
             
             self.state.processed_cheat_sheets = len(generated_results)
             self.state.successful_rule_cards = sum(1 for r in generated_results.values() if r.get('success', False))
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+JSON Bytes Helpers
+
+Serialize and parse JSON as UTF-8 bytes for the ingestion reports, rule card
+exports and configuration files. orjson is used when installed, since it
+writes straight to bytes and is much faster than the stdlib encoder; the
+stdlib fallback is configured to produce the same output.
+
+Extension of Story 2.5 for ASVS integration
+"""
+
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def dump_json_bytes(data: Any, sort_keys: bool = False) -> bytes:
+    """Serialize data to indented UTF-8 JSON bytes; unknown types are written as strings."""
+    if orjson is not None:
+        option = orjson.OPT_INDENT_2 | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+        return orjson.dumps(data, default=str, option=option)
+    return json.dumps(data, indent=2, sort_keys=sort_keys, ensure_ascii=False, default=str).encode('utf-8')
+
+
+def parse_json_bytes(data: bytes) -> Any:
+    """Parse UTF-8 JSON bytes."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
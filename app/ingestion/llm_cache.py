@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+LLM Response Cache
+
+Local caches for LLM responses used during Rule Card generation, so that
+re-running ingestion over unchanged requirements does not pay for the same
+completion twice.
+
+Extension of Story 2.5 for ASVS integration
+"""
+
+import os
+import json
+import hashlib
+import logging
+import tempfile
+from pathlib import Path
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _atomic_write_json(path: Path, data: Any) -> None:
+    """Write JSON to a temporary file and move it into place."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except Exception:
+        os.unlink(tmp_path)
+        raise
+
+
+class PromptResponseCache:
+    """Exact-match cache storing one JSON file per (namespace, prompt) SHA256 key.
+
+    Identical prompts from re-runs over unchanged source content are answered
+    from disk. Matching is deliberately exact: batch prompts share most of their
+    text, so any fuzzy match could serve cards for different requirement IDs or
+    levels.
+    """
+
+    def __init__(self, cache_dir: Path):
+        """Initialize cache rooted at a directory."""
+        self.cache_dir = Path(cache_dir)
+
+    def _path_for(self, text: str, namespace: str) -> Path:
+        """Cache file path for a prompt."""
+        key = hashlib.sha256(f"{namespace}\n{text}".encode('utf-8')).hexdigest()
+        return self.cache_dir / f"{key}.json"
+
+    def get(self, text: str, namespace: str) -> Optional[str]:
+        """Return the cached response for exactly this prompt, if any."""
+        cache_path = self._path_for(text, namespace)
+        if not cache_path.exists():
+            return None
+
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                return json.load(f)['response']
+        except Exception as e:
+            logger.warning(f"Failed to read prompt cache entry {cache_path}: {e}")
+            return None
+
+    def put(self, text: str, namespace: str, response: str) -> None:
+        """Store a response for this prompt."""
+        try:
+            _atomic_write_json(self._path_for(text, namespace), {'response': response})
+        except Exception as e:
+            logger.warning(f"Failed to write prompt cache entry: {e}")
+
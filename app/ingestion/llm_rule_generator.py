@@ -169,6 +169,38 @@ CONTENT:
 
 Generate 3-8 Rule Cards that capture the most important actionable security requirements from this cheat sheet. Focus on requirements that can be validated through code analysis, testing, or configuration checks."""
 
+    def _build_payload(self, cheat_sheet_content: str, cheat_sheet_name: str) -> Dict:
+        """Build the chat completion request body for a cheat sheet"""
+        return {
+            "model": self.model,
+            "messages": [
+                {
+                    "role": "system",
+                    "content": self._create_system_prompt()
+                },
+                {
+                    "role": "user", 
+                    "content": self._create_user_prompt(cheat_sheet_content, cheat_sheet_name)
+                }
+            ],
+            "max_tokens": 4000,
+            "temperature": 0.1,  # Low temperature for consistent output
+            "top_p": 0.9
+        }
+    
+    def _result_from_response(self, data: Dict, start_time: float) -> GenerationResult:
+        """Turn a chat completion response body into a GenerationResult"""
+        content = data['choices'][0]['message']['content']
+        tokens_used = data.get('usage', {}).get('total_tokens', 0)
+        
+        # Split the response into individual rule cards
+        return GenerationResult(
+            success=True,
+            rule_cards=self._parse_rule_cards(content),
+            tokens_used=tokens_used,
+            processing_time=time.time() - start_time
+        )
+    
     def generate_rule_cards(self, cheat_sheet_content: str, cheat_sheet_name: str) -> GenerationResult:
         """
         Generate Rule Cards from OWASP cheat sheet content using ChatGPT
@@ -183,50 +215,60 @@ Generate 3-8 Rule Cards that capture the most important actionable security requ
         start_time = time.time()
         
         try:
-            # Prepare the request
-            payload = {
-                "model": self.model,
-                "messages": [
-                    {
-                        "role": "system",
-                        "content": self._create_system_prompt()
-                    },
-                    {
-                        "role": "user", 
-                        "content": self._create_user_prompt(cheat_sheet_content, cheat_sheet_name)
-                    }
-                ],
-                "max_tokens": 4000,
-                "temperature": 0.1,  # Low temperature for consistent output
-                "top_p": 0.9
-            }
-            
             # Make the API call
             response = requests.post(
                 self.api_url,
                 headers=self.headers,
-                json=payload,
+                json=self._build_payload(cheat_sheet_content, cheat_sheet_name),
                 timeout=60
             )
             response.raise_for_status()
             
-            # Parse response
-            data = response.json()
-            content = data['choices'][0]['message']['content']
-            tokens_used = data.get('usage', {}).get('total_tokens', 0)
-            processing_time = time.time() - start_time
-            
-            # Split the response into individual rule cards
-            rule_cards = self._parse_rule_cards(content)
+            return self._result_from_response(response.json(), start_time)
             
+        except requests.exceptions.RequestException as e:
+            return GenerationResult(
+                success=False,
+                rule_cards=[],
+                error_message=f"API request failed: {str(e)}",
+                processing_time=time.time() - start_time
+            )
+        except Exception as e:
             return GenerationResult(
-                success=True,
-                rule_cards=rule_cards,
-                tokens_used=tokens_used,
-                processing_time=processing_time
+                success=False,
+                rule_cards=[],
+                error_message=f"Generation failed: {str(e)}",
+                processing_time=time.time() - start_time
             )
+    
+    async def generate_rule_cards_async(self, client, cheat_sheet_content: str, cheat_sheet_name: str) -> GenerationResult:
+        """
+        Async variant of generate_rule_cards for running many cheat sheets concurrently
+        
+        Args:
+            client: httpx.AsyncClient shared by the concurrent calls
+            cheat_sheet_content: Raw markdown content from OWASP cheat sheet
+            cheat_sheet_name: Name of the cheat sheet for context
             
-        except requests.exceptions.RequestException as e:
+        Returns:
+            GenerationResult with success status and generated rule cards
+        """
+        import httpx
+        
+        start_time = time.time()
+        
+        try:
+            response = await client.post(
+                self.api_url,
+                headers=self.headers,
+                json=self._build_payload(cheat_sheet_content, cheat_sheet_name),
+                timeout=60
+            )
+            response.raise_for_status()
+            
+            return self._result_from_response(response.json(), start_time)
+            
+        except httpx.HTTPError as e:
             return GenerationResult(
                 success=False,
                 rule_cards=[],
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Shared OpenAI Clients
+
+Shared AsyncOpenAI clients backed by one tuned httpx connection pool each, so
+every Rule Card generator running on an event loop reuses the same keep-alive
+TCP/TLS connections instead of opening a fresh pool per generator instance.
+
+Extension of Story 2.5 for ASVS integration
+"""
+
+import asyncio
+import weakref
+from typing import Any, Dict, Tuple
+
+# Connection pool sizing for the shared clients
+MAX_CONNECTIONS = 100
+MAX_KEEPALIVE_CONNECTIONS = 50
+REQUEST_TIMEOUT = 60.0
+
+# Clients keyed by event loop, then (api_key, max_retries). Pooled connections are bound
+# to the loop that opened them, so each asyncio.run gets its own pool; entries go away
+# with their loop.
+_async_clients: "weakref.WeakKeyDictionary[Any, Dict[Tuple[str, int], Any]]" = weakref.WeakKeyDictionary()
+
+
+def _pool_limits():
+    """Connection limits for the shared httpx pool."""
+    import httpx
+    return httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS)
+
+
+def get_shared_async_client(api_key: str, max_retries: int = 2):
+    """Return the AsyncOpenAI client for this API key on the running event loop."""
+    loop_clients = _async_clients.setdefault(asyncio.get_running_loop(), {})
+    key = (api_key, max_retries)
+    if key not in loop_clients:
+        try:
+            import httpx
+            from openai import AsyncOpenAI
+        except ImportError:
+            raise ImportError("OpenAI library not available. Install with: pip install openai")
+
+        http_client = httpx.AsyncClient(limits=_pool_limits(), timeout=REQUEST_TIMEOUT)
+        loop_clients[key] = AsyncOpenAI(api_key=api_key, max_retries=max_retries, http_client=http_client)
+
+    return loop_clients[key]
+
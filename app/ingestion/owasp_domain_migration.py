@@ -12,6 +12,15 @@ from pathlib import Path
 from typing import Dict, List, Set
 import yaml
 
+def count_rule_files(path) -> int:
+    """Count .yml rule files directly inside a directory (0 if it does not exist)"""
+    try:
+        # DirEntry caches the file type, so no Path objects or extra stat calls per file
+        with os.scandir(path) as entries:
+            return sum(1 for entry in entries if entry.name.endswith('.yml') and entry.is_file(follow_symlinks=False))
+    except FileNotFoundError:
+        return 0
+
 class OwaspDomainMigrator:
     def __init__(self, rule_cards_path: str = "app/rule_cards"):
         self.rule_cards_path = Path(rule_cards_path)
@@ -60,9 +69,8 @@ class OwaspDomainMigrator:
                 owasp_name = subdir.name
                 analysis["owasp_directories"].append(owasp_name)
                 
-                # Count rules in each directory
-                rule_files = list(subdir.glob("*.yml"))
-                rule_count = len(rule_files)
+                # Count rules in each directory (suffix check, no glob pattern matching)
+                rule_count = sum(1 for rule_file in subdir.iterdir() if rule_file.suffix == ".yml")
                 analysis["rule_counts"][owasp_name] = rule_count
                 analysis["total_owasp_rules"] += rule_count
                 
@@ -277,6 +277,22 @@ class OWASPFetcher:
         print(f"\nSuccessfully fetched {len(results)} cheat sheets")
         return results
     
+    def fetch_cheatsheet(self, url: str) -> str:
+        """
+        Fetch a single cheat sheet by URL, bypassing the cache
+        
+        Args:
+            url: Raw markdown URL of the cheat sheet
+            
+        Returns:
+            Markdown content of the cheat sheet
+            
+        Raises:
+            RuntimeError: If fetching or content validation fails
+        """
+        content, _, _ = self._fetch_content_from_url(url)
+        return content
+    
     def check_for_updates(self, sheet_id: str) -> bool:
         """
         Check if a specific cheat sheet has been updated
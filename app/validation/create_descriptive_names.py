@@ -10,6 +10,9 @@ import re
 from pathlib import Path
 from typing import Dict, List, Tuple
 
+# Common words dropped from titles when building names
+TITLE_STOP_WORDS = frozenset({'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'is', 'are', 'be', 'been', 'being', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'should', 'could', 'can', 'may', 'might', 'must', 'shall'})
+
 class DescriptiveNameGenerator:
     def __init__(self, rule_cards_path: str = "app/rule_cards"):
         self.rule_cards_path = Path(rule_cards_path)
@@ -253,10 +256,8 @@ class DescriptiveNameGenerator:
     def simplify_title(self, title: str) -> str:
         """Create simplified version of title for naming"""
         # Remove common words
-        stop_words = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'is', 'are', 'be', 'been', 'being', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'should', 'could', 'can', 'may', 'might', 'must', 'shall'}
-        
         words = re.findall(r'\b\w+\b', title.lower())
-        meaningful_words = [w for w in words if w not in stop_words and len(w) > 2]
+        meaningful_words = [w for w in words if w not in TITLE_STOP_WORDS and len(w) > 2]
         
         if meaningful_words:
             # Take first 2-3 meaningful words
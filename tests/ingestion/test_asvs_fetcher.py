@@ -0,0 +1,65 @@
+"""
+Tests for ASVS Fetcher
+
+Tests reuse of downloaded ASVS markdown across runs.
+"""
+
+import os
+import time
+from unittest.mock import patch
+
+import pytest
+
+from app.ingestion.asvs_fetcher import ASVSFetcher
+
+
+SECTION_MARKDOWN = """# V11 Cryptography
+
+## V11.1 Cryptographic Inventory
+
+| **11.1.1** | Verify that there is a documented policy for management of cryptographic keys. | 2 |
+"""
+
+
+class TestASVSFetcherCache:
+    """Test on-disk reuse of downloaded ASVS sections"""
+
+    @pytest.fixture
+    def section_info(self):
+        """Section description as produced by get_prioritized_asvs_sections"""
+        return {
+            'id': 'V11-Cryptography',
+            'title': 'Cryptography',
+            'file': '0x20-V11-Cryptography.md',
+            'url': 'https://raw.githubusercontent.com/OWASP/ASVS/master/5.0/en/0x20-V11-Cryptography.md',
+            'github_url': 'https://github.com/OWASP/ASVS/blob/master/5.0/en/0x20-V11-Cryptography.md',
+            'description': 'Cryptographic implementation and key management',
+            'priority': 1
+        }
+
+    @pytest.fixture
+    def fetcher(self, tmp_path, monkeypatch):
+        """Fetcher whose relative cache directories live in a temporary directory"""
+        monkeypatch.chdir(tmp_path)
+        return ASVSFetcher()
+
+    def test_recent_download_is_reused_across_fetchers(self, fetcher, section_info):
+        """A fresh fetcher uses the cached markdown instead of downloading again"""
+        with patch.object(ASVSFetcher, 'fetch_asvs_content', return_value=SECTION_MARKDOWN) as mock_fetch:
+            first = fetcher.fetch_asvs_section(section_info)
+            second = ASVSFetcher().fetch_asvs_section(section_info)
+
+        assert mock_fetch.call_count == 1
+        assert [req.id for req in second.requirements] == [req.id for req in first.requirements] == ['11.1.1']
+
+    def test_stale_download_is_fetched_again(self, fetcher, section_info):
+        """Cached markdown older than cache_max_age triggers a new download"""
+        with patch.object(ASVSFetcher, 'fetch_asvs_content', return_value=SECTION_MARKDOWN) as mock_fetch:
+            fetcher.fetch_asvs_section(section_info)
+
+            stale = time.time() - 2 * fetcher.cache_max_age.total_seconds()
+            os.utime(fetcher.cached_sources_path / section_info['file'], (stale, stale))
+
+            ASVSFetcher().fetch_asvs_section(section_info)
+
+        assert mock_fetch.call_count == 2
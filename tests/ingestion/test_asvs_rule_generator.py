@@ -0,0 +1,126 @@
+"""
+Tests for ASVS Rule Card Generator
+
+Tests the OpenAI request path against a mocked HTTP transport.
+"""
+
+import asyncio
+import json
+
+import pytest
+
+httpx = pytest.importorskip("httpx")
+openai = pytest.importorskip("openai")
+pytest.importorskip("aiolimiter")
+
+from app.ingestion import asvs_rule_generator
+from app.ingestion.asvs_fetcher import ASVSSection, ASVSVerificationRequirement
+from app.ingestion.asvs_rule_generator import ASVSRuleCardGenerator
+
+
+RULE_CARDS = {"rule_cards": [{"id": "CRYPTO-KEY-POLICY-001", "title": "Document key management policy"}]}
+
+
+def chat_completion(message):
+    """Chat completion response body carrying the given assistant message"""
+    return {
+        "id": "chatcmpl-test",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "gpt-4o-mini",
+        "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", **message}}],
+        "usage": {"prompt_tokens": 120, "completion_tokens": 30, "total_tokens": 150}
+    }
+
+
+def crypto_section(requirement_count):
+    """V11 section with the given number of requirements"""
+    requirements = [
+        ASVSVerificationRequirement(
+            id=f"11.1.{i}", level=2, description=f"Cryptographic control {i} is verified",
+            category="V11.1 Crypto Inventory", section="Cryptography", raw_text=""
+        )
+        for i in range(1, requirement_count + 1)
+    ]
+    return ASVSSection(id="V11-Cryptography", title="Cryptography", description="", url="", requirements=requirements)
+
+
+class TestCallOpenAIAPI:
+    """Test _call_openai_api against a mocked OpenAI endpoint"""
+    
+    @pytest.fixture
+    def responses(self):
+        """Messages returned by the mocked endpoint, one per request"""
+        return []
+    
+    @pytest.fixture
+    def generator(self, tmp_path, monkeypatch, responses):
+        """Generator whose shared client talks to a MockTransport and caches under tmp_path"""
+        monkeypatch.chdir(tmp_path)
+        
+        def handler(request):
+            if not request.url.path.endswith("/chat/completions"):
+                return httpx.Response(500, json={"error": {"message": "unavailable"}})
+            return httpx.Response(
+                200,
+                json=chat_completion(responses.pop(0)),
+                headers={"x-ratelimit-remaining-requests": "100", "x-ratelimit-remaining-tokens": "100000"}
+            )
+        
+        def mock_client(api_key, max_retries=2):
+            return openai.AsyncOpenAI(
+                api_key=api_key, max_retries=0,
+                http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            )
+        
+        monkeypatch.setattr(asvs_rule_generator, "get_shared_async_client", mock_client)
+        return ASVSRuleCardGenerator(openai_api_key="test-key")
+    
+    def test_successful_call_returns_content_and_usage(self, generator, responses):
+        """Test a 200 response is parsed into content and token usage"""
+        responses.append({"content": json.dumps(RULE_CARDS)})
+        
+        result = asyncio.run(generator._call_openai_api("ASVS section: V11-Cryptography"))
+        
+        assert result["success"] is True
+        assert result["tokens_used"] == 150
+        assert generator._parse_json_rule_cards(result["content"]) == RULE_CARDS["rule_cards"]
+    
+    def test_repeated_prompt_is_served_from_cache(self, generator, responses):
+        """Test a second identical prompt does not reach the API"""
+        responses.append({"content": json.dumps(RULE_CARDS)})
+        
+        asyncio.run(generator._call_openai_api("ASVS section: V11-Cryptography"))
+        result = asyncio.run(generator._call_openai_api("ASVS section: V11-Cryptography"))
+        
+        assert result["cache_hit"] is True
+        assert result["content"] == json.dumps(RULE_CARDS)
+    
+    def test_refusal_fails_and_is_not_cached(self, generator, responses):
+        """Test a structured-output refusal reports failure and the retry reaches the API"""
+        responses.extend([{"content": None, "refusal": "I can't help with that."}, {"content": json.dumps(RULE_CARDS)}])
+        
+        refused = asyncio.run(generator._call_openai_api("ASVS section: V11-Cryptography"))
+        retried = asyncio.run(generator._call_openai_api("ASVS section: V11-Cryptography"))
+        
+        assert refused["success"] is False
+        assert "I can't help with that." in refused["error"]
+        assert retried["success"] is True
+        assert "cache_hit" not in retried
+    
+    def test_parser_tolerates_missing_content(self, generator):
+        """Test parsing a missing response body yields no Rule Cards instead of raising"""
+        assert generator._parse_json_rule_cards(None) == []
+    
+    def test_failed_batch_job_keeps_cached_results(self, generator, monkeypatch):
+        """Test prompts answered from cache are still reported when the Batch API run fails"""
+        section = crypto_section(13)
+        cached_prompt = generator._build_batch_prompts(section, max_requirements_per_batch=12)[0][1]
+        generator._store_cached_responses([(cached_prompt, json.dumps(RULE_CARDS))])
+        monkeypatch.setattr(generator.asvs_fetcher, "fetch_all_priority_sections", lambda levels: [section])
+        
+        results = asyncio.run(generator.generate_bulk_asvs_rule_cards_batch())
+        
+        assert results[section.id].rule_cards == RULE_CARDS["rule_cards"]
+        assert results[section.id].cache_hits == 1
+        assert len(list(generator.batch_work_dir.glob("batch_input_*.jsonl"))) == 1
@@ -135,6 +135,18 @@ class TestSecureCodingParser:
             assert isinstance(req.do_guidance, list)
             assert isinstance(req.dont_guidance, list)
     
+    def test_cached_requirements_are_not_shared(self, parser):
+        """Test memoized requirement extraction returns independent objects"""
+        test_content = "Applications must validate all input. Do not trust user input. " * 10
+        
+        first = parser.identify_actionable_requirements(test_content)
+        first[0].do_guidance.append("mutated")
+        second = parser.identify_actionable_requirements(test_content)
+        
+        assert [req.title for req in first] == [req.title for req in second]
+        assert "mutated" not in second[0].do_guidance
+        assert parser._scan_requirements_cached.cache_info().hits == 1
+    
     def test_actionable_requirements_identification(self, parser):
         """Test identification of actionable requirements from text"""
         test_content = """
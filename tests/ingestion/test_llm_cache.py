@@ -0,0 +1,79 @@
+"""
+Tests for LLM Response Cache
+
+Tests exact-match lookup, namespacing and persistence of cached responses.
+"""
+
+import pytest
+import tempfile
+import shutil
+from pathlib import Path
+
+from app.ingestion.llm_cache import PromptResponseCache
+
+
+def batch_prompt(*requirements):
+    """Build a batch prompt in the generator's format from (id, level, description) tuples"""
+    requests = "\n\n".join(
+        f"=== REQUEST {i} ===\nASVS {req_id} (Level {level}):\n"
+        f"Section: Cryptography - V11.1 Crypto Inventory\nDescription: {description}"
+        for i, (req_id, level, description) in enumerate(requirements, 1)
+    )
+    return f"ASVS section: V11-Cryptography\n\n{requests}"
+
+
+KEY_POLICY = ("11.1.1", 2, "A documented policy for management of cryptographic keys exists")
+KEY_INVENTORY = ("11.1.2", 2, "A cryptographic inventory of keys and algorithms is maintained")
+PROMPT = batch_prompt(KEY_POLICY, KEY_INVENTORY)
+
+
+@pytest.fixture
+def temp_cache_dir():
+    """Create temporary cache directory for testing"""
+    temp_dir = tempfile.mkdtemp()
+    yield temp_dir
+    shutil.rmtree(temp_dir)
+
+
+class TestPromptResponseCache:
+    """Test exact-match prompt cache functionality"""
+    
+    @pytest.fixture
+    def cache(self, temp_cache_dir):
+        """Create cache instance rooted at a temporary directory"""
+        cache = PromptResponseCache(Path(temp_cache_dir) / "prompts")
+        cache.put(PROMPT, "ns", "id: CRYPTO-001\nid: CRYPTO-002")
+        return cache
+    
+    def test_exact_prompt_hits(self, cache):
+        """Test identical prompts return the cached response"""
+        assert cache.get(PROMPT, "ns") == "id: CRYPTO-001\nid: CRYPTO-002"
+    
+    def test_changed_level_misses(self, cache):
+        """Test a requirement at a different ASVS level is not served from cache"""
+        relevelled = (KEY_POLICY[0], 3, KEY_POLICY[2])
+        
+        assert cache.get(batch_prompt(relevelled, KEY_INVENTORY), "ns") is None
+    
+    def test_changed_description_misses(self, cache):
+        """Test a reworded requirement is not served from cache"""
+        reworded = (KEY_POLICY[0], KEY_POLICY[1], KEY_POLICY[2].replace("documented policy", "documented and enforced policy"))
+        
+        assert cache.get(batch_prompt(reworded, KEY_INVENTORY), "ns") is None
+    
+    def test_added_or_removed_requirement_misses(self, cache):
+        """Test batches with a different set of requirement IDs are not served from cache"""
+        extra = ("11.1.3", 3, "All cryptographic primitives in use are listed in the inventory")
+        
+        assert cache.get(batch_prompt(KEY_POLICY), "ns") is None
+        assert cache.get(batch_prompt(KEY_POLICY, KEY_INVENTORY, extra), "ns") is None
+    
+    def test_namespace_isolation(self, cache):
+        """Test entries are only served within their namespace"""
+        assert cache.get(PROMPT, "other") is None
+    
+    def test_persistence(self, cache, temp_cache_dir):
+        """Test entries survive reloading from disk"""
+        reloaded = PromptResponseCache(Path(temp_cache_dir) / "prompts")
+        
+        assert reloaded.get(PROMPT, "ns") == "id: CRYPTO-001\nid: CRYPTO-002"
@@ -0,0 +1,39 @@
+"""
+Tests for Shared OpenAI Clients
+
+Tests that pooled clients are shared within an event loop but never across loops.
+"""
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("httpx")
+pytest.importorskip("openai")
+
+from app.ingestion.openai_clients import get_shared_async_client
+
+
+class TestSharedAsyncClient:
+    """Test per-event-loop client sharing"""
+    
+    def test_same_loop_shares_client(self):
+        """Test repeated lookups on one loop return the same pooled client"""
+        async def lookup_twice():
+            return get_shared_async_client("test-key"), get_shared_async_client("test-key")
+        
+        first, second = asyncio.run(lookup_twice())
+        
+        assert first is second
+    
+    def test_new_loop_gets_new_client(self):
+        """Test a later asyncio.run does not reuse a client bound to a closed loop"""
+        async def lookup():
+            return get_shared_async_client("test-key")
+        
+        assert asyncio.run(lookup()) is not asyncio.run(lookup())
+    
+    def test_lookup_requires_running_loop(self):
+        """Test the client is only handed out from inside a coroutine"""
+        with pytest.raises(RuntimeError):
+            get_shared_async_client("test-key")